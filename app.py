@@ -12,15 +12,29 @@ import os
 import sys
 import io
 import base64
-import glob
+import gc
+import hashlib
+import mimetypes
+import pickle
+import queue
 import shutil
+import tempfile
 import threading
 import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 
-from flask import Flask, render_template, request, jsonify, send_file, send_from_directory, redirect, url_for, flash, session
+from flask import Flask, Request, Response, abort, render_template, request, jsonify, send_file, send_from_directory, redirect, url_for, flash, session
 from flask.json.provider import DefaultJSONProvider
+from flask.sessions import SecureCookieSessionInterface
+from werkzeug.security import safe_join
+
+try:
+    import orjson
+except ImportError:  # Optional: fall back to the stdlib encoder
+    orjson = None
+
 import pandas as pd
 import numpy as np
 import matplotlib
@@ -28,10 +42,17 @@ matplotlib.use('Agg')  # Use non-interactive backend
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image as ReportLabImage
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Flowable, Image as ReportLabImage
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib import colors
+from reportlab.lib.utils import ImageReader
+from reportlab import rl_config
+from PIL import Image as PILImage
+
+# Store PDF image streams as binary Flate data; ReportLab's ASCII85 pass runs in
+# pure Python without its optional C accelerator and dominated report build time
+rl_config.useA85 = 0
 
 # Configure matplotlib for Thai font support
 plt.rcParams["font.family"] = "Tahoma"
@@ -60,19 +81,117 @@ class NumpyJSONProvider(DefaultJSONProvider):
                 return str(obj)
         return super().default(obj)
 
+
+class OrjsonJSONProvider(NumpyJSONProvider):
+    """JSON provider that serializes numpy arrays straight from their buffers with orjson"""
+
+    options = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            # Callers asking for stdlib options (indent, sort_keys, ...) keep the stdlib encoder
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self.options).decode()
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=self.options),
+            mimetype=self.mimetype,
+        )
+
+
+class UploadRequest(Request):
+    """Request that streams uploaded CSV files straight into the upload folder"""
+
+    upload_path: Optional[str] = None
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        # Write the CSV part directly to its final location while the multipart
+        # body is parsed, instead of spooling it to a temp file and copying it
+        # again with file.save(). The size limit is still enforced by Werkzeug
+        # through MAX_CONTENT_LENGTH.
+        if self.endpoint != 'upload_file' or not filename or not filename.endswith('.csv'):
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        # mkstemp creates the file exclusively, so uploads finishing in the same
+        # second never share (and interleave into) one file
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        fd, path = tempfile.mkstemp(
+            dir=app.config['UPLOAD_FOLDER'], prefix=f"energy_data_{timestamp}_", suffix='.csv'
+        )
+        stream = os.fdopen(fd, 'w+b')
+        # Every .csv part gets its own file; which one is the upload is only
+        # known once parsing is done and the parts have their field names
+        self._upload_streams[stream] = path
+        return stream
+
+    def _load_form_data(self):
+        if 'form' in self.__dict__:  # Already parsed
+            return
+        self._upload_streams: Dict[object, str] = {}
+        try:
+            super()._load_form_data()
+        except Exception:
+            # An aborted or oversized upload fails while the body is parsed;
+            # remove the partial CSVs instead of leaving them for the cleanup
+            self._discard_upload_streams()
+            raise
+        # Keep the file behind the 'file' field and drop any other .csv parts
+        upload = self.files.get('file')
+        if upload is not None:
+            self.upload_path = self._upload_streams.pop(upload.stream, None)
+        self._discard_upload_streams()
+
+    def _discard_upload_streams(self):
+        """Close and delete the streamed CSV parts that are not the upload"""
+        for stream, path in self._upload_streams.items():
+            stream.close()
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+        self._upload_streams.clear()
+
+
+class KeepAliveSessionInterface(SecureCookieSessionInterface):
+    """Cookie sessions that are not re-signed on every keep-alive poll"""
+
+    def should_set_cookie(self, app, session):
+        # Permanent sessions are normally re-signed and re-sent on every request;
+        # keep-alive polls only do so when the handler refreshes the session
+        if request.endpoint == 'keep_alive':
+            return session.modified
+        return super().should_set_cookie(app, session)
+
+
 app = Flask(__name__, static_folder='static', static_url_path='/static')
-app.json_provider_class = NumpyJSONProvider
+app.json = (OrjsonJSONProvider if orjson else NumpyJSONProvider)(app)
+app.request_class = UploadRequest
+app.session_interface = KeepAliveSessionInterface()
 app.secret_key = os.urandom(24)
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['OUTPUT_FOLDER'] = 'static/outputs'
+app.config['CACHE_FOLDER'] = os.path.join(app.config['UPLOAD_FOLDER'], 'cache')  # Pickled analysis results
+app.config['MAX_CACHE_FILES'] = 200
+app.config['RENDER_STAMP_FILE'] = os.path.join(app.config['CACHE_FOLDER'], 'rendered_graphs.pkl')  # Which analysis drew the current graphs
+app.config['MAX_MEMORY_CACHE_ENTRIES'] = 16  # Analysis results kept in process memory
 app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0  # Disable caching for static files in development
+app.config['STATIC_IMAGES_MAX_AGE'] = 3600  # Logos never change between runs, let browsers cache them
+
+# Let a fronting web server stream files instead of the Python worker:
+# USE_X_SENDFILE=1 emits X-Sendfile (Apache mod_xsendfile, lighttpd), while
+# X_ACCEL_REDIRECT_PREFIX=/protected-outputs/ emits nginx X-Accel-Redirect
+# for generated outputs (the prefix must map to an internal nginx location)
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE', '').lower() in ('1', 'true', 'yes')
+app.config['X_ACCEL_REDIRECT_PREFIX'] = os.environ.get('X_ACCEL_REDIRECT_PREFIX', '')
 
 # Session configuration to prevent timeout during slow data entry
 app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(hours=2)  # Extended session lifetime
 app.config['SESSION_COOKIE_SECURE'] = False  # Set to True in production with HTTPS
 app.config['SESSION_COOKIE_HTTPONLY'] = True
 app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
+app.config['KEEP_ALIVE_REFRESH_SECONDS'] = 10 * 60  # Re-sign the session cookie at most this often
 
 # Add custom filter for datetime formatting
 @app.template_filter('strftime')
@@ -85,6 +204,34 @@ def strftime_filter(timestamp, format_string):
 # Ensure upload and output directories exist
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 os.makedirs(app.config['OUTPUT_FOLDER'], exist_ok=True)
+os.makedirs(app.config['CACHE_FOLDER'], exist_ok=True)
+
+
+def scan_file_mtimes(directory: str):
+    """Return (paths, mtimes) NumPy arrays for the regular files in a directory"""
+    entries = []
+    try:
+        with os.scandir(directory) as it:
+            entries = [(entry.path, entry.stat().st_mtime) for entry in it if entry.is_file()]
+    except FileNotFoundError:
+        pass
+    paths = np.array([path for path, _ in entries], dtype=object)
+    mtimes = np.array([mtime for _, mtime in entries], dtype=np.float64)
+    return paths, mtimes
+
+
+def remove_files(paths, label: str) -> None:
+    """Delete the given files, logging each removal"""
+    for file_path in paths:
+        try:
+            os.unlink(file_path)
+        except FileNotFoundError:
+            # Another worker's cleanup got there first; keep going
+            continue
+        except OSError as e:
+            print(f"Error removing {label} {os.path.basename(file_path)}: {e}")
+            continue
+        print(f"Removed {label}: {os.path.basename(file_path)}")
 
 
 def cleanup_old_files(max_age_hours=24):
@@ -94,51 +241,38 @@ def cleanup_old_files(max_age_hours=24):
     More conservative cleanup to avoid deleting files in active sessions
     """
     try:
-        current_time = datetime.now()
+        # Plain epoch seconds, directly comparable with st_mtime
+        now_ts = time.time()
         # Increased cleanup time to prevent deleting files during slow data entry
-        cutoff_time = current_time - timedelta(hours=max_age_hours)
+        cutoff_ts = now_ts - max_age_hours * 3600
         
-        # Get list of currently active session files to avoid deletion
-        active_files = set()
+        # Each directory is scanned once and filtered with vectorized mtime masks;
+        # only the (usually small) set of expired paths is iterated in Python
         try:
-            # This is a simplified approach - in production you might want to track active sessions more carefully
-            upload_dir = app.config['UPLOAD_FOLDER']
-            if os.path.exists(upload_dir):
-                for filename in os.listdir(upload_dir):
-                    file_path = os.path.join(upload_dir, filename)
-                    if os.path.isfile(file_path):
-                        file_time = datetime.fromtimestamp(os.path.getmtime(file_path))
-                        # Only delete files older than 24 hours (more conservative)
-                        if file_time < cutoff_time:
-                            # Additional check: don't delete files modified in last 2 hours
-                            if (current_time - file_time).total_seconds() > 7200:  # 2 hours
-                                os.remove(file_path)
-                                print(f"Removed old upload file: {filename}")
-                            else:
-                                active_files.add(filename)
+            paths, mtimes = scan_file_mtimes(app.config['UPLOAD_FOLDER'])
+            # Only delete files older than 24 hours and not modified in last 2 hours
+            expired = (mtimes < cutoff_ts) & (now_ts - mtimes > 7200)
+            remove_files(paths[expired], "old upload file")
         except Exception as e:
             print(f"Error during upload directory cleanup: {e}")
         
-        # Clean up output directory with similar conservative approach
-        output_dir = app.config['OUTPUT_FOLDER']
-        if os.path.exists(output_dir):
-            for filename in os.listdir(output_dir):
-                file_path = os.path.join(output_dir, filename)
-                if os.path.isfile(file_path):
-                    file_time = datetime.fromtimestamp(os.path.getmtime(file_path))
-                    # Only delete files older than 24 hours and not modified in last 2 hours
-                    if file_time < cutoff_time and (current_time - file_time).total_seconds() > 7200:
-                        os.remove(file_path)
-                        print(f"Removed old output file: {filename}")
+        # Clean up output directory with similar conservative approach; temp text
+        # images are matched in the same pass and cleaned up more aggressively
+        paths, mtimes = scan_file_mtimes(app.config['OUTPUT_FOLDER'])
+        names = np.array([os.path.basename(path) for path in paths], dtype=str)
+        is_temp = np.char.startswith(names, 'temp_text_') & np.char.endswith(names, '.png')
+        ages = now_ts - mtimes
+        remove_files(paths[is_temp & (ages > 3600)], "temp file")  # 1 hour for temp files
+        remove_files(paths[~is_temp & (mtimes < cutoff_ts) & (ages > 7200)], "old output file")
         
-        # Clean up temp text images if any exist (more aggressive cleanup for temp files)
-        temp_pattern = os.path.join(output_dir, "temp_text_*.png")
-        temp_files = glob.glob(temp_pattern)
-        for temp_file in temp_files:
-            file_time = datetime.fromtimestamp(os.path.getmtime(temp_file))
-            if (current_time - file_time).total_seconds() > 3600:  # 1 hour for temp files
-                os.remove(temp_file)
-                print(f"Removed temp file: {os.path.basename(temp_file)}")
+        # Evict cached analysis results: drop expired entries, then keep only the
+        # most recently used ones (loads touch the file, so mtime tracks last use)
+        paths, mtimes = scan_file_mtimes(app.config['CACHE_FOLDER'])
+        expired = mtimes < cutoff_ts
+        remove_files(paths[expired], "old cache file")
+        paths, mtimes = paths[~expired], mtimes[~expired]
+        newest_first = np.argsort(mtimes)[::-1]
+        remove_files(paths[newest_first[app.config['MAX_CACHE_FILES']:]], "evicted cache file")
             
     except Exception as e:
         print(f"Error during file cleanup: {e}")
@@ -147,20 +281,239 @@ def cleanup_old_files(max_age_hours=24):
 # Run cleanup on startup
 cleanup_old_files()
 
+CLEANUP_INTERVAL_SECONDS = 6 * 60 * 60  # Run cleanup every 6 hours
+cleanup_stop_event = threading.Event()
+
 
 def schedule_cleanup():
-    """Schedule cleanup to run periodically"""
-    while True:
-        # Run cleanup every 6 hours
-        time.sleep(6 * 60 * 60)
+    """Schedule cleanup to run periodically until cleanup_stop_event is set"""
+    while not cleanup_stop_event.wait(CLEANUP_INTERVAL_SECONDS):
         cleanup_old_files()
 
 
 # Start cleanup thread
-cleanup_thread = threading.Thread(target=schedule_cleanup, daemon=True)
+cleanup_thread = threading.Thread(target=schedule_cleanup, name='file-cleanup', daemon=True)
 cleanup_thread.start()
 
 
+def file_sha256(file_path: str) -> str:
+    """Return the SHA-256 hex digest of a file"""
+    with open(file_path, 'rb') as f:
+        return hashlib.file_digest(f, 'sha256').hexdigest()
+
+
+def analysis_cache_path(file_hash: str, params: Dict) -> str:
+    """Path of the cached battery analysis for an uploaded file and parameter set"""
+    params_key = repr(tuple(float(params[name]) for name in
+                            ('solar_capacity', 'sun_hours', 'battery_threshold', 'battery_size')))
+    params_hash = hashlib.sha256(params_key.encode()).hexdigest()[:16]
+    return os.path.join(app.config['CACHE_FOLDER'], f"{file_hash}_{params_hash}.pkl")
+
+
+# Process-local LRU of recently used analysis results, in front of the on-disk cache
+analysis_memory_cache: "OrderedDict[str, List[Dict]]" = OrderedDict()
+analysis_memory_cache_lock = threading.Lock()
+
+
+def remember_analysis(cache_path: str, battery_analysis: List[Dict]) -> None:
+    """Keep analysis results in the process-local LRU cache"""
+    with analysis_memory_cache_lock:
+        analysis_memory_cache[cache_path] = battery_analysis
+        analysis_memory_cache.move_to_end(cache_path)
+        while len(analysis_memory_cache) > app.config['MAX_MEMORY_CACHE_ENTRIES']:
+            analysis_memory_cache.popitem(last=False)
+
+
+def save_cached_analysis(cache_path: str, battery_analysis: List[Dict]) -> None:
+    """Persist battery analysis results so /results doesn't have to recompute them"""
+    remember_analysis(cache_path, battery_analysis)
+    try:
+        tmp_path = f"{cache_path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(battery_analysis, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        print(f"Error writing analysis cache: {e}")
+
+
+def load_cached_analysis(cache_path: str) -> Optional[List[Dict]]:
+    """Load cached battery analysis results, or None on a cache miss"""
+    with analysis_memory_cache_lock:
+        battery_analysis = analysis_memory_cache.get(cache_path)
+        if battery_analysis is not None:
+            analysis_memory_cache.move_to_end(cache_path)
+            return battery_analysis
+    try:
+        with open(cache_path, 'rb') as f:
+            battery_analysis = pickle.load(f)
+        os.utime(cache_path)  # Mark as recently used for LRU eviction
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"Error reading analysis cache: {e}")
+        return None
+    remember_analysis(cache_path, battery_analysis)
+    return battery_analysis
+
+
+def list_output_images() -> List[Dict]:
+    """List generated PNG graphs in the output folder with a single directory scan"""
+    output_dir = app.config['OUTPUT_FOLDER']
+    images = []
+    try:
+        with os.scandir(output_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith('.png') and entry.is_file():
+                    images.append({
+                        'filename': entry.name,
+                        'path': entry.path,
+                        'mtime': entry.stat().st_mtime
+                    })
+    except FileNotFoundError:
+        pass
+    return images
+
+
+# PDF report sections keyed by the filename prefix SolarAnalyzerPro writes
+REPORT_IMAGE_SECTIONS = {
+    'solar_weekly_summary': 'weekly',
+    'solar_daily_analysis_': 'daily',
+}
+REPORT_IMAGE_PREFIXES = tuple(REPORT_IMAGE_SECTIONS)
+
+
+def report_graph_stamp() -> Dict[str, int]:
+    """Map each report graph currently in the output folder to its mtime in nanoseconds"""
+    stamp = {}
+    try:
+        with os.scandir(app.config['OUTPUT_FOLDER']) as entries:
+            for entry in entries:
+                name = entry.name
+                if name.endswith('.png') and name.startswith(REPORT_IMAGE_PREFIXES):
+                    stamp[name] = entry.stat().st_mtime_ns
+    except FileNotFoundError:
+        pass
+    return stamp
+
+
+def record_rendered_graphs(cache_path: str) -> None:
+    """Remember which cached analysis the graphs in the output folder were drawn for"""
+    record = {'analysis': os.path.basename(cache_path), 'graphs': report_graph_stamp()}
+    try:
+        tmp_path = f"{app.config['RENDER_STAMP_FILE']}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(record, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, app.config['RENDER_STAMP_FILE'])
+    except Exception as e:
+        print(f"Error writing rendered graphs record: {e}")
+
+
+def graphs_rendered_for(cache_path: str) -> bool:
+    """Whether the output folder still holds exactly the graphs drawn for ``cache_path``"""
+    try:
+        with open(app.config['RENDER_STAMP_FILE'], 'rb') as f:
+            record = pickle.load(f)
+    except FileNotFoundError:
+        return False
+    except Exception as e:
+        print(f"Error reading rendered graphs record: {e}")
+        return False
+    # Any graph rewritten by another run, or removed by cleanup, changes the stamp
+    return (record.get('analysis') == os.path.basename(cache_path)
+            and bool(record.get('graphs'))
+            and record['graphs'] == report_graph_stamp())
+
+
+def partition_report_images() -> Dict[str, List[str]]:
+    """Split the output PNGs into sorted weekly/daily filename lists in one scan"""
+    sections: Dict[str, List[str]] = {section: [] for section in REPORT_IMAGE_SECTIONS.values()}
+    try:
+        with os.scandir(app.config['OUTPUT_FOLDER']) as entries:
+            for entry in entries:
+                name = entry.name
+                # One C-level tuple check rejects everything that is not a report graph
+                if not name.endswith('.png') or not name.startswith(REPORT_IMAGE_PREFIXES):
+                    continue
+                for prefix in REPORT_IMAGE_PREFIXES:
+                    if name.startswith(prefix):
+                        sections[REPORT_IMAGE_SECTIONS[prefix]].append(name)
+                        break
+    except FileNotFoundError:
+        pass
+    for filenames in sections.values():
+        filenames.sort()
+    return sections
+
+
+def decode_report_image(file_path: str) -> ImageReader:
+    """Decode a generated graph into an RGB ImageReader for PDF embedding"""
+    # Graphs are rendered on an opaque background, so dropping the alpha channel
+    # loses nothing and spares ReportLab from encoding a separate soft mask
+    with PILImage.open(file_path) as image:
+        return ImageReader(image.convert('RGB'))
+
+
+class ReaderImage(Flowable):
+    """Fixed-size PDF image that decodes its graph only while it is drawn"""
+
+    def __init__(self, file_path: str, width: float, height: float):
+        super().__init__()
+        self.file_path = file_path
+        self.drawWidth = width
+        self.drawHeight = height
+
+    def wrap(self, availWidth, availHeight):
+        return self.drawWidth, self.drawHeight
+
+    def draw(self):
+        # The decoded pixels are dropped as soon as the page has them, so only
+        # one graph is held in memory at a time however long the report is
+        reader = decode_report_image(self.file_path)
+        self.canv.drawImage(reader, 0, 0, self.drawWidth, self.drawHeight, mask='auto')
+
+
+def report_image(file_path: str, width: float, height: float) -> ReaderImage:
+    """Create a PDF image flowable for a generated graph, decoded lazily at draw time"""
+    # Opening reads only the PNG header, so unreadable graphs are still caught
+    # while the story is built and skipped by the caller
+    with PILImage.open(file_path):
+        pass
+    return ReaderImage(file_path, width, height)
+
+
+# Per-day scalar fields reduced into the analysis summary
+SUMMARY_COLUMNS = (
+    'consumption_area',
+    'solar_area',
+    'total_excess_energy',
+    'total_deficit_energy',
+    'optimal_battery_size',
+    'battery_discharge_16_22_area',
+)
+
+
+def summarize_battery_analysis(battery_analysis: List[Dict]) -> Dict:
+    """Reduce per-day analysis results into the report summary"""
+    # Stack the per-day scalars once and reduce them in a single NumPy pass
+    per_day = np.fromiter(
+        (day[column] for day in battery_analysis for column in SUMMARY_COLUMNS),
+        dtype=np.float64,
+        count=len(battery_analysis) * len(SUMMARY_COLUMNS),
+    ).reshape(-1, len(SUMMARY_COLUMNS))
+    totals = dict(zip(SUMMARY_COLUMNS, per_day.sum(axis=0).tolist()))
+    means = dict(zip(SUMMARY_COLUMNS, per_day.mean(axis=0).tolist()))
+    
+    return {
+        "total_days": len(battery_analysis),
+        "average_daily_consumption": means["consumption_area"],
+        "average_daily_solar": means["solar_area"],
+        "total_excess_energy": totals["total_excess_energy"],
+        "total_deficit_energy": totals["total_deficit_energy"],
+        "average_battery_size": means["optimal_battery_size"],
+        "total_battery_discharge": totals["battery_discharge_16_22_area"],
+    }
+
+
 class WebSolarAnalyzer:
     """Web-enabled version of the Solar Analyzer Pro"""
     
@@ -169,9 +522,14 @@ class WebSolarAnalyzer:
         self.analyzer.output_dir = app.config['OUTPUT_FOLDER']  # Update output directory
         self.uploaded_file = None
         
+    def reset(self) -> None:
+        """Clear per-request state so the instance can be handed to another request"""
+        self.analyzer.reset()
+        self.uploaded_file = None
+        
     def process_uploaded_file(self, file_path: str) -> bool:
         """Process uploaded CSV file"""
-        result = self.analyzer.load_and_parse_data(file_path)
+        result = self.load_parsed_data(file_path)
         
         # Additional validation for empty or invalid data
         if result and self.analyzer.df is not None:
@@ -204,6 +562,27 @@ class WebSolarAnalyzer:
         
         return result
     
+    def load_parsed_data(self, file_path: str) -> bool:
+        """Load the CSV, reusing a pickled copy of the parsed DataFrame when available"""
+        parsed_path = f"{file_path}.parsed.pkl"
+        try:
+            if os.path.getmtime(parsed_path) >= os.path.getmtime(file_path):
+                self.analyzer.df = pd.read_pickle(parsed_path)
+                print(f"📂 โหลดข้อมูลที่แปลงแล้วจาก: {parsed_path}")
+                return True
+        except OSError:
+            pass
+        except Exception as e:
+            print(f"Error reading parsed data cache: {e}")
+        
+        result = self.analyzer.load_and_parse_data(file_path)
+        if result and self.analyzer.df is not None:
+            try:
+                self.analyzer.df.to_pickle(parsed_path)
+            except Exception as e:
+                print(f"Error writing parsed data cache: {e}")
+        return result
+    
     def configure_parameters(self, solar_capacity: float, sun_hours: float, 
                             battery_threshold: float, battery_size: float) -> None:
         """Configure analysis parameters from web form"""
@@ -220,48 +599,88 @@ class WebSolarAnalyzer:
         self.analyzer.create_solar_generation()
         self.analyzer.calculate_daily_battery_requirements()
         
-        # Generate graphs
-        self.analyzer.create_daily_graphs_with_battery()
-        self.analyzer.create_weekly_summary()
+        # Generate graphs; long-lived workers must not accumulate figures
+        try:
+            self.analyzer.create_daily_graphs_with_battery()
+            self.analyzer.create_weekly_summary()
+        finally:
+            plt.close('all')
+            gc.collect()
         
-        # Return summary data
+        # Return summary data; the per-day dicts keep their numpy arrays, the
+        # JSON provider serializes them directly if they are ever sent as JSON
         if self.analyzer.battery_analysis:
-            # Convert numpy arrays to lists for JSON serialization
-            daily_data = []
-            for day in self.analyzer.battery_analysis:
-                day_copy = day.copy()
-                # Convert numpy arrays to lists and handle non-serializable objects
-                for key, value in day_copy.items():
-                    if hasattr(value, 'tolist'):
-                        day_copy[key] = value.tolist()
-                    elif hasattr(value, 'isoformat'):  # Handle datetime objects
-                        day_copy[key] = value.isoformat()
-                    elif hasattr(value, '__iter__'):  # Handle other iterables
-                        try:
-                            day_copy[key] = list(value)
-                        except:
-                            day_copy[key] = str(value)
-                    elif hasattr(value, '__dict__'):  # Handle numpy scalars
-                        try:
-                            day_copy[key] = float(value)
-                        except:
-                            day_copy[key] = str(value)
-                daily_data.append(day_copy)
-            
-            summary = {
-                "total_days": len(self.analyzer.battery_analysis),
-                "average_daily_consumption": sum(day["consumption_area"] for day in self.analyzer.battery_analysis) / len(self.analyzer.battery_analysis),
-                "average_daily_solar": sum(day["solar_area"] for day in self.analyzer.battery_analysis) / len(self.analyzer.battery_analysis),
-                "total_excess_energy": sum(day["total_excess_energy"] for day in self.analyzer.battery_analysis),
-                "total_deficit_energy": sum(day["total_deficit_energy"] for day in self.analyzer.battery_analysis),
-                "average_battery_size": sum(day["optimal_battery_size"] for day in self.analyzer.battery_analysis) / len(self.analyzer.battery_analysis),
-                "total_battery_discharge": sum(day["battery_discharge_16_22_area"] for day in self.analyzer.battery_analysis),
-                "daily_data": daily_data
-            }
+            summary = summarize_battery_analysis(self.analyzer.battery_analysis)
+            summary["daily_data"] = self.analyzer.battery_analysis
             return summary
         return {"error": "Analysis failed"}
 
 
+# Bounded pool of analyzers reused across requests instead of rebuilding one per call
+analyzer_pool: "queue.Queue[WebSolarAnalyzer]" = queue.Queue(maxsize=os.cpu_count() or 2)
+
+
+def acquire_web_analyzer() -> WebSolarAnalyzer:
+    """Take an idle analyzer from the pool, creating one if none is free"""
+    try:
+        return analyzer_pool.get_nowait()
+    except queue.Empty:
+        return WebSolarAnalyzer()
+
+
+def release_web_analyzer(web_analyzer: Optional[WebSolarAnalyzer]) -> None:
+    """Reset an analyzer and return it to the pool (dropped if the pool is full)"""
+    if web_analyzer is None:
+        return
+    # Reset before pooling so idle analyzers do not keep DataFrames alive
+    web_analyzer.reset()
+    try:
+        analyzer_pool.put_nowait(web_analyzer)
+    except queue.Full:
+        pass
+
+
+def get_battery_analysis(params: Dict) -> Optional[List[Dict]]:
+    """Return per-day results for the session's file and parameters, from cache if possible"""
+    cache_path = None
+    if 'file_hash' in session:
+        cache_path = analysis_cache_path(session['file_hash'], params)
+        battery_analysis = load_cached_analysis(cache_path)
+        if battery_analysis is not None:
+            return battery_analysis
+    
+    # Re-run analysis to get daily data on a cache miss
+    file_path = session.get('uploaded_file')
+    if not file_path or not os.path.exists(file_path):
+        return None
+    web_analyzer = acquire_web_analyzer()
+    try:
+        
+        # Load and process file
+        if not web_analyzer.process_uploaded_file(file_path):
+            return None
+        # Configure parameters
+        web_analyzer.configure_parameters(
+            params['solar_capacity'],
+            params['sun_hours'],
+            params['battery_threshold'],
+            params['battery_size']
+        )
+        
+        # Run analysis to get daily data
+        web_analyzer.analyzer.create_solar_generation()
+        web_analyzer.analyzer.calculate_daily_battery_requirements()
+        battery_analysis = web_analyzer.analyzer.battery_analysis
+        if battery_analysis and cache_path:
+            save_cached_analysis(cache_path, battery_analysis)
+        return battery_analysis
+    except Exception as e:
+        print(f"Error re-running analysis for daily data: {e}")
+        return None
+    finally:
+        release_web_analyzer(web_analyzer)
+
+
 @app.route('/')
 def index():
     """Main page with upload form"""
@@ -281,11 +700,9 @@ def upload_file():
         return redirect(url_for('index'))
     
     if file and file.filename.endswith('.csv'):
-        # Save uploaded file
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"energy_data_{timestamp}.csv"
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(file_path)
+        # The file was already streamed to disk by UploadRequest while parsing
+        file_path = request.upload_path
+        file.close()
         
         # Make session permanent to prevent timeout during slow data entry
         session.permanent = True
@@ -295,6 +712,7 @@ def upload_file():
         session['filename'] = file.filename
         session['upload_time'] = datetime.now().isoformat()
         session['file_size'] = os.path.getsize(file_path)
+        session['file_hash'] = file_sha256(file_path)
         
         flash('อัปโหลดไฟล์สำเร็จ!', 'success')
         return redirect(url_for('configure'))
@@ -319,6 +737,7 @@ def configure():
         session.pop('filename', None)
         session.pop('upload_time', None)
         session.pop('file_size', None)
+        session.pop('file_hash', None)
         return redirect(url_for('index'))
     
     return render_template('configure.html')
@@ -340,9 +759,11 @@ def analyze():
         session.pop('filename', None)
         session.pop('upload_time', None)
         session.pop('file_size', None)
+        session.pop('file_hash', None)
         return redirect(url_for('index'))
     
     # Get form parameters
+    web_analyzer = None
     try:
         solar_capacity = float(request.form.get('solar_capacity', 3.0))
         sun_hours = float(request.form.get('sun_hours', 4.0))
@@ -353,8 +774,25 @@ def analyze():
         if solar_capacity <= 0 or sun_hours <= 0 or battery_threshold < 0 or battery_size < 0:
             raise ValueError("พารามิเตอร์ต้องมีค่ามากกว่าหรือเท่ากับ 0")
         
-        # Initialize analyzer
-        web_analyzer = WebSolarAnalyzer()
+        analysis_params = {
+            'solar_capacity': solar_capacity,
+            'sun_hours': sun_hours,
+            'battery_threshold': battery_threshold,
+            'battery_size': battery_size
+        }
+        if 'file_hash' not in session:
+            session['file_hash'] = file_sha256(file_path)
+        cache_path = analysis_cache_path(session['file_hash'], analysis_params)
+        
+        # Skip the analysis entirely when this file and parameter set were already
+        # analysed and the output folder still holds that run's graphs
+        if graphs_rendered_for(cache_path) and load_cached_analysis(cache_path) is not None:
+            session.pop('analysis_results', None)
+            session['analysis_params'] = analysis_params
+            return redirect(url_for('results'))
+        
+        # Borrow an analyzer from the pool
+        web_analyzer = acquire_web_analyzer()
         
         # Load and process file
         file_loaded = web_analyzer.process_uploaded_file(session['uploaded_file'])
@@ -376,124 +814,45 @@ def analyze():
             flash(f'ข้อผิดพลาดในการวิเคราะห์: {str(e)}', 'error')
             return redirect(url_for('configure'))
         
-        # Store only summary data in session (not daily_data which is too large)
-        session_results = results.copy()
-        if 'daily_data' in session_results:
-            # Remove daily_data from session to avoid cookie size limit
-            session_results.pop('daily_data', None)
+        # Keep only the parameters in the session cookie; the results themselves
+        # live in the server-side analysis cache keyed by file hash + parameters
+        session.pop('analysis_results', None)
+        session['analysis_params'] = analysis_params
         
-        # Ensure no numpy arrays or other non-serializable objects in session
-        def make_json_serializable(obj):
-            """Convert numpy arrays and other non-serializable objects to JSON-serializable types"""
-            if hasattr(obj, 'tolist'):  # numpy arrays
-                return obj.tolist()
-            elif hasattr(obj, 'isoformat'):  # datetime objects
-                return obj.isoformat()
-            elif hasattr(obj, '__iter__') and not isinstance(obj, (str, bytes)):  # other iterables
-                try:
-                    return [make_json_serializable(item) for item in obj]
-                except:
-                    return str(obj)
-            elif hasattr(obj, '__dict__'):  # numpy scalars and other objects
-                try:
-                    return float(obj)
-                except:
-                    return str(obj)
-            return obj
-        
-        # Recursively convert all values in session_results
-        json_safe_results = {}
-        for key, value in session_results.items():
-            json_safe_results[key] = make_json_serializable(value)
-        
-        session['analysis_results'] = json_safe_results
-        session['analysis_params'] = {
-            'solar_capacity': solar_capacity,
-            'sun_hours': sun_hours,
-            'battery_threshold': battery_threshold,
-            'battery_size': battery_size
-        }
+        # Cache per-day results so the results pages can skip re-running the analysis
+        save_cached_analysis(cache_path, web_analyzer.analyzer.battery_analysis)
+        record_rendered_graphs(cache_path)
         
         return redirect(url_for('results'))
         
     except (ValueError, TypeError) as e:
         flash(f'ข้อมูลพารามิเตอร์ไม่ถูกต้อง: {str(e)}', 'error')
         return redirect(url_for('configure'))
+    finally:
+        release_web_analyzer(web_analyzer)
 
 
 @app.route('/results')
 def results():
     """Display analysis results"""
-    if 'analysis_results' not in session:
+    if 'analysis_params' not in session:
         flash('ไม่มีผลการวิเคราะห์ กรุณาทำการวิเคราะห์ก่อน', 'error')
         return redirect(url_for('configure'))
     
-    results = session['analysis_results']
     params = session['analysis_params']
+    battery_analysis = get_battery_analysis(params)
+    if not battery_analysis:
+        flash('ไม่มีผลการวิเคราะห์ กรุณาทำการวิเคราะห์ก่อน', 'error')
+        return redirect(url_for('configure'))
     
-    # Re-run analysis to get daily data (since it's too large for session)
-    if 'uploaded_file' in session:
-        try:
-            web_analyzer = WebSolarAnalyzer()
-            
-            # Load and process file
-            file_loaded = web_analyzer.process_uploaded_file(session['uploaded_file'])
-            if file_loaded:
-                # Configure parameters
-                web_analyzer.configure_parameters(
-                    params['solar_capacity'],
-                    params['sun_hours'],
-                    params['battery_threshold'],
-                    params['battery_size']
-                )
-                
-                # Run analysis to get daily data
-                web_analyzer.analyzer.create_solar_generation()
-                web_analyzer.analyzer.calculate_daily_battery_requirements()
-                
-                # Add daily data to results (convert numpy arrays to lists)
-                if web_analyzer.analyzer.battery_analysis:
-                    daily_data = []
-                    for day in web_analyzer.analyzer.battery_analysis:
-                        day_copy = day.copy()
-                        # Convert numpy arrays to lists and handle non-serializable objects
-                        for key, value in day_copy.items():
-                            if hasattr(value, 'tolist'):
-                                day_copy[key] = value.tolist()
-                            elif hasattr(value, 'isoformat'):  # Handle datetime objects
-                                day_copy[key] = value.isoformat()
-                            elif hasattr(value, '__iter__'):  # Handle other iterables
-                                try:
-                                    day_copy[key] = list(value)
-                                except:
-                                    day_copy[key] = str(value)
-                            elif hasattr(value, '__dict__'):  # Handle numpy scalars
-                                try:
-                                    day_copy[key] = float(value)
-                                except:
-                                    day_copy[key] = str(value)
-                        daily_data.append(day_copy)
-                    results['daily_data'] = daily_data
-        except Exception as e:
-            print(f"Error re-running analysis for daily data: {e}")
+    results = summarize_battery_analysis(battery_analysis)
+    # The template only reads scalar fields, so the per-day dicts are used as-is
+    results['daily_data'] = battery_analysis
     
-    # Get list of generated images
-    output_files = []
-    output_dir = app.config['OUTPUT_FOLDER']
-    if os.path.exists(output_dir):
-        for filename in os.listdir(output_dir):
-            if filename.endswith('.png'):
-                file_path = os.path.join(output_dir, filename)
-                # Get file modification time
-                mtime = os.path.getmtime(file_path)
-                output_files.append({
-                    'filename': filename,
-                    'path': file_path,
-                    'url': url_for('static', filename=f'outputs/{filename}'),
-                    'mtime': mtime
-                })
-    
-    # Sort by modification time (newest first)
+    # Get list of generated images (newest first)
+    output_files = list_output_images()
+    for image in output_files:
+        image['url'] = url_for('static', filename=f"outputs/{image['filename']}")
     output_files.sort(key=lambda x: x['mtime'], reverse=True)
     
     return render_template('results.html', results=results, params=params, images=output_files)
@@ -515,17 +874,21 @@ def download_file(filename):
 @app.route('/generate_pdf')
 def generate_pdf():
     """Generate PDF report"""
-    if 'analysis_results' not in session:
+    if 'analysis_params' not in session:
         flash('ไม่มีผลการวิเคราะห์ กรุณาทำการวิเคราะห์ก่อน', 'error')
         return redirect(url_for('results'))
     
-    results = session['analysis_results']
     params = session['analysis_params']
+    battery_analysis = get_battery_analysis(params)
+    if not battery_analysis:
+        flash('ไม่มีผลการวิเคราะห์ กรุณาทำการวิเคราะห์ก่อน', 'error')
+        return redirect(url_for('configure'))
+    results = summarize_battery_analysis(battery_analysis)
     
-    # Create PDF
+    # Create PDF in memory; it is streamed straight to the client, never written to disk
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     pdf_filename = f"solar_analysis_report_{timestamp}.pdf"
-    pdf_path = os.path.join(app.config['OUTPUT_FOLDER'], pdf_filename)
+    pdf_buffer = io.BytesIO()
     
     # Import required modules for PDF generation
     from reportlab.lib.pagesizes import A4
@@ -539,7 +902,7 @@ def generate_pdf():
     
     
     # Create custom document with better margins
-    doc = SimpleDocTemplate(pdf_path, pagesize=A4,
+    doc = SimpleDocTemplate(pdf_buffer, pagesize=A4,
                            leftMargin=0.75*inch, rightMargin=0.75*inch,
                            topMargin=0.75*inch, bottomMargin=0.75*inch)
     styles = getSampleStyleSheet()
@@ -707,16 +1070,19 @@ def generate_pdf():
     story.append(Spacer(1, 12))
     
     output_dir = app.config['OUTPUT_FOLDER']
-    if os.path.exists(output_dir):
+    report_images = partition_report_images()
+    weekly_files = report_images['weekly']
+    daily_files = report_images['daily']
+    
+    if weekly_files or daily_files:
         # Add weekly summary first with caption
-        weekly_files = [f for f in os.listdir(output_dir) if 'weekly_summary' in f and f.endswith('.png')]
         if weekly_files:
             story.append(Paragraph("Weekly Summary", subheading_style))
-            for filename in sorted(weekly_files):
+            for filename in weekly_files:
                 file_path = os.path.join(output_dir, filename)
                 try:
                     # Add image to PDF with proper sizing and centering
-                    img = ReportLabImage(file_path, width=6.5*inch, height=4*inch)
+                    img = report_image(file_path, 6.5*inch, 4*inch)
                     img.hAlign = 'CENTER'
                     story.append(img)
                     story.append(Spacer(1, 6))
@@ -730,7 +1096,6 @@ def generate_pdf():
                     pass
         
         # Add daily analysis graphs with better organization
-        daily_files = [f for f in os.listdir(output_dir) if 'daily_analysis' in f and f.endswith('.png')]
         if daily_files:
             story.append(PageBreak())
             story.append(Paragraph("Daily Analysis Details", subheading_style))
@@ -755,7 +1120,7 @@ def generate_pdf():
                         story.append(Spacer(1, 6))
                         
                         # Add image with proper sizing
-                        img = ReportLabImage(file_path, width=6*inch, height=3.5*inch)
+                        img = report_image(file_path, 6*inch, 3.5*inch)
                         img.hAlign = 'CENTER'
                         story.append(img)
                         
@@ -767,28 +1132,46 @@ def generate_pdf():
     
     # Build PDF
     doc.build(story)
+    pdf_buffer.seek(0)
     
     # Return PDF for download
-    return send_file(pdf_path, as_attachment=True, download_name=pdf_filename)
+    return send_file(pdf_buffer, mimetype='application/pdf', as_attachment=True, download_name=pdf_filename)
 
 
 @app.route('/static/images/<filename>')
 def serve_static_images(filename):
     """Serve static image files with proper headers"""
-    return send_from_directory('static/images', filename)
+    return send_from_directory('static/images', filename, max_age=app.config['STATIC_IMAGES_MAX_AGE'])
 
 
 @app.route('/static/outputs/<filename>')
 def serve_static_outputs(filename):
     """Serve static output files with proper headers"""
+    # Output filenames are reused across runs, so they are always revalidated
+    # (conditional requests still get a cheap 304) rather than cached for a fixed time
+    accel_prefix = app.config['X_ACCEL_REDIRECT_PREFIX']
+    if accel_prefix:
+        file_path = safe_join(app.config['OUTPUT_FOLDER'], filename)
+        if file_path is None or not os.path.isfile(file_path):
+            abort(404)
+        response = Response(mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+        response.headers['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + filename
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
     return send_from_directory('static/outputs', filename)
 
 
 @app.route('/keep-alive', methods=['POST'])
 def keep_alive():
     """Keep session alive during slow data entry or analysis"""
-    # Just return success to keep session active
-    return jsonify({'status': 'alive', 'timestamp': datetime.now().isoformat()})
+    # Only touch the session (and so re-sign the cookie) once per refresh
+    # interval; that is enough to keep a 2 hour session from expiring
+    now = time.time()
+    if now - session.get('keep_alive_at', 0) >= app.config['KEEP_ALIVE_REFRESH_SECONDS']:
+        session['keep_alive_at'] = now
+    response = jsonify({'status': 'alive', 'timestamp': datetime.now().isoformat()})
+    response.headers['Cache-Control'] = 'no-store'
+    return response
 
 
 if __name__ == '__main__':
@@ -17,18 +17,426 @@ load window.
 
 from __future__ import annotations
 
+import codecs
+import csv
+import functools
+import io
+import math
 import os
+import re
 import sys
-from typing import Dict, List, Optional
+import tempfile
+from typing import Dict, List, Optional, Tuple
 
-import matplotlib.dates as mdates
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 
-# Configure matplotlib defaults (Thai font friendly where available)
-plt.rcParams["font.family"] = "Tahoma"
-plt.rcParams["font.size"] = 10
+# Thai fonts shipped with the project, registered with matplotlib on first use
+FONT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fonts")
+
+
+@functools.lru_cache(maxsize=None)
+def _plotting():
+    """
+    Import and configure matplotlib the first time a graph is drawn, so
+    loading data and printing summaries never pay for it.
+
+    Selects the Agg backend (graphs are only ever written to files), registers
+    the bundled fonts and sets the font defaults. Returns ``(pyplot, dates)``.
+    """
+    import matplotlib
+
+    matplotlib.use("Agg")
+
+    import matplotlib.dates as mdates
+    import matplotlib.pyplot as plt
+    from matplotlib import font_manager
+
+    for font_file in ("Sarabun-Regular.ttf", "Sarabun-Bold.ttf"):
+        try:
+            font_manager.fontManager.addfont(os.path.join(FONT_DIR, font_file))
+        except (OSError, RuntimeError):  # Missing or unreadable font file
+            pass
+
+    def font_available(family: str) -> bool:
+        try:
+            font_manager.findfont(
+                font_manager.FontProperties(family=family), fallback_to_default=False
+            )
+        except ValueError:
+            return False
+        return True
+
+    # Only families that resolve: an unknown name is looked up (and warned
+    # about) again for every text element drawn
+    families = [f for f in ("Sarabun", "Tahoma") if font_available(f)] or ["sans-serif"]
+
+    # Configure matplotlib defaults (Thai font friendly where available)
+    plt.rcParams["font.family"] = families
+    plt.rcParams["font.size"] = 10
+    return plt, mdates
+
+
+# Quarter-hour meter export layout: datetime, then RATE A/B/C each followed by
+# an unused column. Only the datetime and rate columns are read, with a fixed
+# schema so pandas does not have to infer types per column.
+CSV_COLUMNS = ["datetime", "rate_a", "empty1", "rate_b", "empty2", "rate_c", "empty3"]
+CSV_USECOLS = ["datetime", "rate_a", "rate_b", "rate_c"]
+CSV_SCHEMA = {
+    "datetime": "string",
+    "rate_a": "float64",
+    "rate_b": "float64",
+    "rate_c": "float64",
+}
+
+# "DD/MM/YYYY[ HH.MM]" split into the part before the year, the year and the time
+THAI_DATETIME_PATTERN = r"^(?P<day_month>[^/\s]*/[^/\s]*/)(?P<year>\d+)(?:$|\s+(?P<time>\S+))"
+
+# Encodings tried in order when the file carries no byte order mark
+CSV_ENCODINGS = ("utf-8", "windows-1252", "iso-8859-1", "tis-620")
+
+# Byte order marks and the codec that strips them, longest first
+CSV_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+# zlib level for saved graphs: level 6 (the default) spends most of the save
+# time in deflate for a few percent smaller files
+PNG_COMPRESS_LEVEL = 3
+
+# Daily summary table layout, bound once
+_SUMMARY_HEADER_FORMAT = "{:<12} {:>12} {:>12} {:>10} {:>10} {:>16} {:>18}".format
+_SUMMARY_ROW_FORMAT = (
+    "{:<12} {:>12.0f} {:>12.0f} {:>10.0f} {:>10.0f} {:>16.0f} {:>18.0f}".format
+)
+
+# Meter timestamp formats, primary first
+DATETIME_FORMATS = ("%d/%m/%Y %H.%M", "%d/%m/%Y %H:%M")
+
+# Per-day fields of ``battery_analysis`` that hold time series, not scalars
+BATTERY_SERIES_FIELDS = (
+    "power_difference",
+    "cumulative_balance",
+    "battery_discharge_kw",
+    "effective_load_kw",
+)
+
+
+def _trapz_uniform(values: np.ndarray, dx: float = 0.25) -> float:
+    """
+    Trapezoidal integral of uniformly spaced samples, identical to
+    ``np.trapz(values, dx=dx)`` but computed from a single ``sum()``.
+    Accumulates in float64 whatever the sample dtype.
+    """
+    values = np.asarray(values)
+    if values.size < 2:
+        return 0.0
+    ends = float(values[0]) + float(values[-1])
+    return float(dx * (values.sum(dtype=np.float64) - 0.5 * ends))
+
+
+def _weekly_areas(
+    consumption: np.ndarray, solar: np.ndarray, starts: np.ndarray, dx: float = 0.25
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Energy areas and mean power of a multi-day window in one reduction pass.
+
+    ``starts`` are the first rows of the contiguous day blocks. The four
+    series consumption, solar, excess (solar above load) and negated deficit
+    (load above solar, as drawn below the axis) are written in place into one
+    float32 buffer, like the inputs, and reduced per block with a single
+    ``np.add.reduceat`` accumulating in float64; whole-window trapezoids then
+    follow from the block sums and the two end samples, per-day ones from
+    each block's endpoints, and the means from the same sums.
+
+    Returns ``(series, totals, per_day, means)``: the ``(4, n)`` buffer, the
+    four window areas (deficit as a positive energy), the ``(2, days)``
+    consumption/solar areas per day and the four window means.
+    """
+    series = np.empty((4, len(consumption)), dtype=np.float32)
+    series[0] = consumption
+    series[1] = solar
+    np.subtract(series[1], series[0], out=series[3])
+    # Excess and negated deficit from one clip each: min(diff, 0) == -max(0, -diff)
+    np.clip(series[3], 0.0, None, out=series[2])
+    np.clip(series[3], None, 0.0, out=series[3])
+
+    sums = np.add.reduceat(series, starts, axis=1, dtype=np.float64)
+    window_sums = sums.sum(axis=1)
+    means = window_sums / series.shape[1]
+    if series.shape[1] < 2:
+        totals = np.zeros(4)
+    else:
+        totals = dx * (window_sums - 0.5 * (series[:, 0] + series[:, -1]))
+        totals[3] = -totals[3]
+    stops = np.r_[starts[1:], series.shape[1]]
+    per_day = dx * (sums[:2] - 0.5 * (series[:2, starts] + series[:2, stops - 1]))
+    return series, totals, per_day, means
+
+
+def _save_png(fig, path: str, dpi: int) -> None:
+    """
+    Write ``fig`` as PNG through one large buffered handle, with the format
+    given explicitly rather than inferred from the file name.
+
+    The image is rendered into a temporary file next to ``path`` and moved
+    over it once complete, so a failed render never leaves a truncated PNG
+    where the report and the result page would pick it up.
+    """
+    directory, name = os.path.split(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory or ".", prefix=f".{name}.", suffix=".tmp")
+    try:
+        with open(fd, "wb", buffering=1 << 20) as handle:
+            fig.savefig(
+                handle,
+                format="png",
+                dpi=dpi,
+                pil_kwargs={"compress_level": PNG_COMPRESS_LEVEL},
+            )
+        # mkstemp files are owner-only; graphs are served as static files
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+
+
+def _evening_slice(hours: np.ndarray, start_hour: int = 16, end_hour: int = 22) -> slice:
+    """
+    Positions of the ``[start_hour, end_hour)`` window in one day's samples.
+    Rows are sorted by time, so the window is contiguous and found with two
+    binary searches; slicing with it yields views instead of masked copies.
+    """
+    start, stop = np.searchsorted(np.asarray(hours), (start_hour, end_hour))
+    return slice(int(start), int(stop))
+
+
+def _simulate_discharge(
+    excess_kw: np.ndarray, battery_energy: float, dt_h: float = 0.25
+) -> Tuple[np.ndarray, float]:
+    """
+    Discharge a battery holding ``battery_energy`` kWh against the per-slot
+    load ``excess_kw`` in time order, each slot taking as much as is left.
+
+    The greedy carry is expressed without a loop: the energy delivered up to
+    a slot is ``min(cumulative need, battery_energy)``, so each slot's share
+    is the step of that capped running total.
+
+    Returns ``(discharge_kw, total_discharged_kwh)``.
+    """
+    need = np.maximum(np.asarray(excess_kw, dtype=float), 0.0) * dt_h
+    delivered = np.minimum(np.cumsum(need), max(float(battery_energy), 0.0))
+    give = np.diff(delivered, prepend=0.0)
+    total = float(delivered[-1]) if delivered.size else 0.0
+    return give / dt_h, total
+
+
+# Daylight window of the synthetic solar profile, in hours
+SUNRISE_HOUR, SUNSET_HOUR = 6.0, 18.0
+
+
+@functools.lru_cache(maxsize=32)
+def _solar_template(solar_capacity_kw: float, target_energy: float) -> Tuple[float, float, np.ndarray]:
+    """
+    Quarter-hour Gaussian day profile peaking at 90% of ``solar_capacity_kw``
+    whose energy matches ``target_energy`` kWh.
+
+    Returns ``(sigma, daily_energy, template)``. Cached because repeated runs
+    use the same few parameter pairs; the template is read-only as every
+    caller shares it.
+    """
+    t0 = 0.5 * (SUNRISE_HOUR + SUNSET_HOUR)
+
+    hours = np.arange(0.0, 24.0, 0.25)
+    peak_kw = solar_capacity_kw * 0.9
+    mask_template = (hours >= SUNRISE_HOUR) & (hours <= SUNSET_HOUR)
+    offsets_sq = (hours[mask_template] - t0) ** 2
+
+    def daily_energy_for_sigma(sig: float) -> Tuple[float, float]:
+        # Samples outside the daylight window are zero, so the trapezoid
+        # over the whole day is 0.25 * sum of the window samples; the
+        # derivative with respect to sigma comes out of the same pass
+        shape = np.exp(-0.5 * offsets_sq / sig**2)
+        energy = 0.25 * peak_kw * float(shape.sum())
+        slope = 0.25 * peak_kw * float((shape * offsets_sq).sum()) / sig**3
+        return energy, slope
+
+    # Energy rises monotonically with sigma. Solve E(sigma) = target with
+    # Newton steps seeded from the untruncated Gaussian integral, falling
+    # back to bisection whenever a step leaves the bracket (same sigma
+    # range as the former doubling + bisection search).
+    lo, hi = 0.2, 320.0
+    sigma = min(max(target_energy / (peak_kw * math.sqrt(2.0 * math.pi)), lo), hi)
+    for _ in range(60):
+        energy, slope = daily_energy_for_sigma(sigma)
+        error = energy - target_energy
+        if error < 0:
+            lo = sigma
+        else:
+            hi = sigma
+        if abs(error) <= 1e-12 * target_energy:
+            break
+        step = sigma - error / slope if slope > 0 else 0.5 * (lo + hi)
+        if not lo < step < hi:
+            step = 0.5 * (lo + hi)
+        if abs(step - sigma) <= 1e-15 * sigma:
+            break
+        sigma = step
+
+    template = np.zeros(hours.shape, dtype=np.float32)
+    z_template = (hours[mask_template] - t0) / sigma
+    template[mask_template] = solar_capacity_kw * 0.9 * np.exp(-0.5 * z_template**2)
+    template.flags.writeable = False
+    return sigma, daily_energy_for_sigma(sigma)[0], template
+
+
+def _daily_solar_metrics(
+    load: np.ndarray,
+    solar: np.ndarray,
+    hours: np.ndarray,
+    power_difference: np.ndarray,
+    threshold_kw: float,
+    battery_size_kwh: float,
+) -> Dict[str, object]:
+    """
+    Solar/battery metrics of one day, see
+    :meth:`SolarAnalyzerPro.calculate_solar_metrics`.
+    """
+    solar_produced_per_day = _trapz_uniform(solar)
+
+    # Direct solar consumption
+    direct_use = float(np.minimum(solar, load).sum(dtype=np.float64)) * 0.25
+
+    solar_to_battery = _trapz_uniform(np.maximum(0.0, power_difference))
+
+    evening_load = load[_evening_slice(hours)]
+
+    load_16_22 = float(evening_load.sum(dtype=np.float64)) * 0.25
+    excess_above_threshold_area = (
+        float(np.maximum(0.0, solar - threshold_kw).sum(dtype=np.float64)) * 0.25
+    )
+    load_excess = np.maximum(0.0, evening_load - threshold_kw)
+    load_above_threshold_area = float(load_excess.sum(dtype=np.float64)) * 0.25
+
+    # Cap the available battery energy at the specified battery size
+    if battery_size_kwh > 0:
+        remaining_battery_energy = min(solar_to_battery, battery_size_kwh)
+    else:
+        remaining_battery_energy = solar_to_battery  # 100% round-trip efficiency
+
+    battery_discharge_kw, battery_discharge_area = _simulate_discharge(
+        load_excess, remaining_battery_energy
+    )
+
+    # Discharged energy comes straight off the evening load
+    effective_load_kw = evening_load - battery_discharge_kw
+    load_16_22_with_threshold = load_16_22 - battery_discharge_area
+
+    return {
+        "solar_produced_per_day": solar_produced_per_day,
+        "solar_consumed_directly": float(direct_use),
+        "solar_to_battery": solar_to_battery,
+        "load_16_22": float(load_16_22),
+        "load_16_22_with_battery_threshold": float(load_16_22_with_threshold),
+        "excess_above_1500_area": float(excess_above_threshold_area),
+        "battery_discharge_16_22_area": float(battery_discharge_area),
+        "load_above_1500_area_16_22": float(load_above_threshold_area),
+        # 16:00-22:00 dispatch, reused by the daily graph
+        "battery_discharge_kw": battery_discharge_kw,
+        "effective_load_kw": effective_load_kw,
+    }
+
+
+def _analyze_day(
+    date,
+    daily_consumption: np.ndarray,
+    daily_solar: np.ndarray,
+    hours: np.ndarray,
+    battery_size_kwh: float,
+    threshold_kw: float,
+) -> Dict:
+    """
+    Battery envelope and metrics of one day from its own sample arrays,
+    as analysed by :meth:`SolarAnalyzerPro.calculate_daily_battery_requirements`.
+    """
+    power_difference = daily_solar - daily_consumption
+    # Running sum in float64 so long days do not drift
+    cumulative_balance = np.cumsum(power_difference, dtype=np.float64) * 0.25
+
+    max_excess = float(cumulative_balance.max())
+    max_deficit = float(cumulative_balance.min())
+    battery_size_needed = max(abs(max_excess), abs(max_deficit))
+
+    # Surplus and shortfall from one clip: pos - diff == max(0, -diff)
+    surplus = np.maximum(power_difference, 0.0)
+    shortfall = surplus - power_difference
+    total_excess_energy = _trapz_uniform(surplus)
+    total_deficit_energy = _trapz_uniform(shortfall)
+    net_energy_balance = total_excess_energy - total_deficit_energy
+
+    # Use user-specified battery size if provided, otherwise calculate optimal size
+    if battery_size_kwh > 0:
+        optimal_battery_size = battery_size_kwh
+    else:
+        optimal_battery_size = battery_size_needed * 0.8
+
+    consumption_area = _trapz_uniform(daily_consumption)
+    solar_area = _trapz_uniform(daily_solar)
+
+    solar_metrics = _daily_solar_metrics(
+        daily_consumption,
+        daily_solar,
+        hours,
+        power_difference,
+        threshold_kw,
+        battery_size_kwh,
+    )
+
+    return {
+        "date": date,
+        "power_difference": power_difference,
+        "cumulative_balance": cumulative_balance,
+        "max_excess": max_excess,
+        "max_deficit": max_deficit,
+        "battery_size_needed": battery_size_needed,
+        "optimal_battery_size": optimal_battery_size,
+        "total_excess_energy": total_excess_energy,
+        "total_deficit_energy": total_deficit_energy,
+        "net_energy_balance": net_energy_balance,
+        "consumption_area": consumption_area,
+        "solar_area": solar_area,
+        **solar_metrics,
+    }
+
+
+# Plain decimal numbers as typed at the prompts (no exponents, inf or nan)
+_FLOAT_RE = re.compile(r"[+-]?(?:\d+(?:\.\d*)?|\.\d+)")
+
+
+def _prompt_float(
+    prompt: str,
+    default: float,
+    error_message: str,
+    *,
+    lo: float = 0.0,
+    hi: float = math.inf,
+    allow_zero: bool = False,
+) -> float:
+    """
+    Ask until the answer is empty (``default``) or a number in ``(lo, hi]``,
+    or ``[lo, hi]`` when ``allow_zero`` is set.
+    """
+    while True:
+        text = input(prompt).strip()
+        if not text:
+            return default
+        if _FLOAT_RE.fullmatch(text):
+            value = float(text)
+            if (value >= lo if allow_zero else value > lo) and value <= hi:
+                return value
+        print(error_message)
 
 
 class SolarAnalyzerPro:
@@ -37,20 +445,28 @@ class SolarAnalyzerPro:
     """
 
     def __init__(self) -> None:
+        self.reset()
+
+        self.output_dir = "output"
+        if not os.path.exists(self.output_dir):
+            os.makedirs(self.output_dir, exist_ok=True)
+            print(f"📁 สร้างโฟลเดอร์ {self.output_dir}/ สำหรับเก็บผลลัพธ์")
+
+    def reset(self) -> None:
+        """
+        Drop loaded data, results and parameters so the instance can be
+        reused for another analysis; the output directory is kept.
+        """
         self.df: Optional[pd.DataFrame] = None
         self.solar_generation: Optional[np.ndarray] = None
         self.battery_analysis: Optional[List[Dict]] = None
+        self.battery_df: Optional[pd.DataFrame] = None
 
         self.solar_capacity_mw: float = 3.0
         self.sun_hours: float = 4.0
         self.battery_threshold_w: float = 1500.0
         self.battery_size_kwh: float = 0.0  # 0 means auto-calculate
 
-        self.output_dir = "output"
-        if not os.path.exists(self.output_dir):
-            os.makedirs(self.output_dir, exist_ok=True)
-            print(f"📁 สร้างโฟลเดอร์ {self.output_dir}/ สำหรับเก็บผลลัพธ์")
-
     # --------------------------------------------------------------------- #
     # Interactive configuration                                             #
     # --------------------------------------------------------------------- #
@@ -65,67 +481,37 @@ class SolarAnalyzerPro:
         print(line)
 
         # Solar capacity (MWp)
-        while True:
-            text = input("📏 ขนาดระบบโซลาร์ (MWp) [Default: 3.0]: ").strip()
-            if not text:
-                self.solar_capacity_mw = 3.0
-                break
-            try:
-                value = float(text)
-                if value <= 0:
-                    raise ValueError
-                self.solar_capacity_mw = value
-                break
-            except ValueError:
-                print("❌ กรุณาใส่ตัวเลขที่ถูกต้อง (เช่น 3.0, 5.5, 10)")
+        self.solar_capacity_mw = _prompt_float(
+            "📏 ขนาดระบบโซลาร์ (MWp) [Default: 3.0]: ",
+            3.0,
+            "❌ กรุณาใส่ตัวเลขที่ถูกต้อง (เช่น 3.0, 5.5, 10)",
+        )
         print(f"✅ ขนาดระบบโซลาร์: {self.solar_capacity_mw:.2f} MWp")
 
         # Avg sunlight hours
-        while True:
-            text = input("☀️ ชั่วโมงแดดเฉลี่ย/วัน [Default: 4.0]: ").strip()
-            if not text:
-                self.sun_hours = 4.0
-                break
-            try:
-                value = float(text)
-                if value <= 0 or value > 12:
-                    raise ValueError
-                self.sun_hours = value
-                break
-            except ValueError:
-                print("❌ ชั่วโมงแดดต้องอยู่ระหว่าง 0-12 ชั่วโมง")
+        self.sun_hours = _prompt_float(
+            "☀️ ชั่วโมงแดดเฉลี่ย/วัน [Default: 4.0]: ",
+            4.0,
+            "❌ ชั่วโมงแดดต้องอยู่ระหว่าง 0-12 ชั่วโมง",
+            hi=12.0,
+        )
         print(f"✅ ชั่วโมงแดดเฉลี่ย: {self.sun_hours:.1f} ชม./วัน")
 
         # Battery threshold
-        while True:
-            text = input("⚡ เกณฑ์เริ่มจ่ายแบต (W) [Default: 1500]: ").strip()
-            if not text:
-                self.battery_threshold_w = 1500.0
-                break
-            try:
-                value = float(text)
-                if value <= 0:
-                    raise ValueError
-                self.battery_threshold_w = value
-                break
-            except ValueError:
-                print("❌ กรุณาใส่ตัวเลขที่ถูกต้อง (เช่น 1200, 1500, 2200)")
+        self.battery_threshold_w = _prompt_float(
+            "⚡ เกณฑ์เริ่มจ่ายแบต (W) [Default: 1500]: ",
+            1500.0,
+            "❌ กรุณาใส่ตัวเลขที่ถูกต้อง (เช่น 1200, 1500, 2200)",
+        )
         print(f"✅ เกณฑ์เริ่มจ่ายแบต: {self.battery_threshold_w:.0f} W")
 
         # Battery size
-        while True:
-            text = input("🔋 ขนาดแบตเตอรี่ (kWh) [0=คำนวณอัตโนมัติ, Default: 0]: ").strip()
-            if not text:
-                self.battery_size_kwh = 0.0
-                break
-            try:
-                value = float(text)
-                if value < 0:
-                    raise ValueError
-                self.battery_size_kwh = value
-                break
-            except ValueError:
-                print("❌ กรุณาใส่ตัวเลขที่ถูกต้อง (เช่น 10, 20.5, 50) หรือ 0 สำหรับคำนวณอัตโนมัติ")
+        self.battery_size_kwh = _prompt_float(
+            "🔋 ขนาดแบตเตอรี่ (kWh) [0=คำนวณอัตโนมัติ, Default: 0]: ",
+            0.0,
+            "❌ กรุณาใส่ตัวเลขที่ถูกต้อง (เช่น 10, 20.5, 50) หรือ 0 สำหรับคำนวณอัตโนมัติ",
+            allow_zero=True,
+        )
         if self.battery_size_kwh > 0:
             print(f"✅ ขนาดแบตเตอรี่: {self.battery_size_kwh:.1f} kWh (กำหนดเอง)")
         else:
@@ -147,6 +533,46 @@ class SolarAnalyzerPro:
     # --------------------------------------------------------------------- #
     # Data ingestion                                                        #
     # --------------------------------------------------------------------- #
+    @staticmethod
+    def _decode_meter_csv(raw: bytes) -> Tuple[str, str]:
+        """
+        Decode the raw export in memory and return ``(text, encoding)``.
+        A byte order mark decides the codec outright; otherwise the first of
+        ``CSV_ENCODINGS`` that decodes the whole file wins.
+        """
+        for bom, encoding in CSV_BOMS:
+            if raw.startswith(bom):
+                return raw.decode(encoding), encoding
+        for encoding in CSV_ENCODINGS:
+            try:
+                return raw.decode(encoding), encoding
+            except UnicodeDecodeError:
+                continue
+        raise UnicodeDecodeError(
+            CSV_ENCODINGS[-1], raw, 0, len(raw), "no supported encoding matched"
+        )
+
+    @staticmethod
+    def _read_meter_csv(text: str) -> pd.DataFrame:
+        """
+        Parse the decoded meter export with the fixed ``CSV_SCHEMA``; rate
+        columns that hold non-numeric text are re-read untyped and coerced by
+        the caller. Exports without the trailing empty column are named from
+        the header's field count, as the layout in ``CSV_FORMAT.md`` allows.
+        """
+        header = next(csv.reader(io.StringIO(text)), [])
+        names = CSV_COLUMNS[: len(header)]
+        read_kwargs = dict(
+            header=0,
+            names=names,
+            usecols=[col for col in CSV_USECOLS if col in names],
+            engine="c",
+        )
+        try:
+            return pd.read_csv(io.StringIO(text), dtype=CSV_SCHEMA, **read_kwargs)
+        except ValueError:
+            return pd.read_csv(io.StringIO(text), dtype={"datetime": "string"}, **read_kwargs)
+
     def load_and_parse_data(self, file_path: str = "data/kw.csv") -> bool:
         """
         Load the raw CSV and prepare time-series structure.
@@ -156,89 +582,55 @@ class SolarAnalyzerPro:
             print(f"❌ ไม่พบไฟล์: {file_path}")
             return False
 
-        # Try different encodings that might handle CSV files better
-        encodings = ["utf-8-sig", "utf-8", "windows-1252", "iso-8859-1", "tis-620"]
-        df = None
-        
-        for encoding in encodings:
-            try:
-                print(f"   กำลังลองใช้ encoding: {encoding}")
-                df = pd.read_csv(file_path, encoding=encoding)
-                print(f"   ✅ อ่านไฟล์สำเร็จด้วย encoding: {encoding}")
-                break
-            except UnicodeDecodeError:
-                print(f"   ❌ ไม่สามารถอ่านด้วย encoding: {encoding}")
-                continue
-            except Exception as exc:
-                print(f"   ❌ ข้อผิดพลาดอื่นๆ กับ encoding {encoding}: {exc}")
-                continue
-        
-        if df is None:
-            print(f"❌ ไม่สามารถอ่านไฟล์ด้วย encoding ที่รองรับทั้งหมดได้: {encodings}")
+        # Read the file once and pick the encoding from the bytes in memory
+        # instead of re-reading it with every candidate encoding
+        try:
+            with open(file_path, "rb") as handle:
+                raw = handle.read()
+            text, encoding = self._decode_meter_csv(raw)
+        except (OSError, UnicodeDecodeError) as exc:
+            print(f"❌ ไม่สามารถอ่านไฟล์ด้วย encoding ที่รองรับทั้งหมดได้: {exc}")
             return False
+        del raw
 
-        expected_cols = [
-            "datetime",
-            "rate_a",
-            "empty1",
-            "rate_b",
-            "empty2",
-            "rate_c",
-            "empty3",
-        ]
-        df.columns = expected_cols[: len(df.columns)]
+        try:
+            df = self._read_meter_csv(text)
+        except Exception as exc:
+            print(f"   ❌ ข้อผิดพลาดอื่นๆ กับ encoding {encoding}: {exc}")
+            return False
+        print(f"   ✅ อ่านไฟล์สำเร็จด้วย encoding: {encoding}")
 
         datetime_str = df["datetime"].astype(str).str.strip()
         datetime_str = datetime_str.str.replace(" 24.00", " 00.00", regex=False)
         
         # Handle different date formats and add better error handling
-        # First, convert Thai Buddhist years to Gregorian years
-        def convert_thai_to_gregorian(date_str):
-            if isinstance(date_str, str):
-                # Split date and time
-                parts = date_str.strip().split()
-                if len(parts) >= 1:
-                    date_part = parts[0]
-                    time_part = parts[1] if len(parts) > 1 else "00.00"
-                    
-                    # Split date components
-                    date_components = date_part.split('/')
-                    if len(date_components) == 3:
-                        try:
-                            year = int(date_components[2])
-                            # Convert Thai Buddhist year to Gregorian year
-                            if year > 2500:  # Likely Thai Buddhist year
-                                year = year - 543
-                                date_components[2] = str(year)
-                                new_date = '/'.join(date_components)
-                                return f"{new_date} {time_part}"
-                        except ValueError:
-                            pass
-            return date_str
-        
-        # Apply Thai year conversion
-        converted_datetime_str = datetime_str.apply(convert_thai_to_gregorian)
+        # First, convert Thai Buddhist years to Gregorian years in one vectorized
+        # pass: split "DD/MM/YYYY HH.MM" into its parts and subtract 543 from
+        # years past 2500, keeping every other row exactly as it was
+        parts = datetime_str.str.extract(THAI_DATETIME_PATTERN)
+        year = pd.to_numeric(parts["year"], errors="coerce")
+        is_thai = year > 2500
+        gregorian = (
+            parts["day_month"]
+            + (year - 543).astype("Int64").astype(str)
+            + " "
+            + parts["time"].fillna("00.00")
+        )
+        converted_datetime_str = datetime_str.where(~is_thai, gregorian)
         
-        # Try different date formats
-        try:
-            df["datetime"] = pd.to_datetime(
-                converted_datetime_str, format="%d/%m/%Y %H.%M", errors="coerce"
-            )
-        except:
-            try:
-                # Try alternative format
-                df["datetime"] = pd.to_datetime(
-                    converted_datetime_str, format="%d/%m/%Y %H:%M", errors="coerce"
+        # Parse with the export's explicit format; quarter-hour timestamps repeat
+        # heavily, so cache=True converts each distinct string once. The colon
+        # variant is only tried when the primary format leaves >1% unparsed.
+        parsed = pd.to_datetime(
+            converted_datetime_str, format=DATETIME_FORMATS[0], errors="coerce", cache=True
+        )
+        if parsed.isna().mean() > 0.01:
+            parsed = parsed.fillna(
+                pd.to_datetime(
+                    converted_datetime_str, format=DATETIME_FORMATS[1], errors="coerce", cache=True
                 )
-            except:
-                try:
-                    # Try parsing with dayfirst=True as fallback
-                    df["datetime"] = pd.to_datetime(
-                        converted_datetime_str, dayfirst=True, errors="coerce"
-                    )
-                except:
-                    print("❌ ไม่สามารถแปลงวันที่ได้ด้วยวิธีใดๆ")
-                    return False
+            )
+        df["datetime"] = parsed
         
         # Remove rows with invalid dates
         invalid_dates = df["datetime"].isna()
@@ -253,8 +645,10 @@ class SolarAnalyzerPro:
         mask_midnight = datetime_str.str.contains("24.00", na=False)
         df.loc[mask_midnight, "datetime"] += pd.Timedelta(days=1)
 
+        # kW readings fit comfortably in float32, which halves the memory the
+        # per-sample arrays take; reductions over them accumulate in float64
         for col in ["rate_a", "rate_b", "rate_c"]:
-            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0.0)
+            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0.0).astype(np.float32)
 
         df = df.dropna(subset=["datetime"]).sort_values("datetime").reset_index(drop=True)
         df["consumption"] = df["rate_a"] + df["rate_b"] + df["rate_c"]
@@ -284,19 +678,7 @@ class SolarAnalyzerPro:
         solar_capacity_kw = self.solar_capacity_mw * 1000.0
         target_energy = solar_capacity_kw * float(self.sun_hours)
 
-        sunrise, sunset = 6.0, 18.0
-        t0 = 0.5 * (sunrise + sunset)
-
-        hours = np.arange(0.0, 24.0, 0.25)
-
-        def daily_energy_for_sigma(sig: float) -> float:
-            mask = (hours >= sunrise) & (hours <= sunset)
-            power = np.zeros_like(hours)
-            z = (hours[mask] - t0) / sig
-            power[mask] = solar_capacity_kw * 0.9 * np.exp(-0.5 * z**2)
-            return float(np.trapz(power, dx=0.25))
-
-        max_possible_energy = solar_capacity_kw * (sunset - sunrise)
+        max_possible_energy = solar_capacity_kw * (SUNSET_HOUR - SUNRISE_HOUR)
         if target_energy > max_possible_energy:
             print(
                 f"⚠️ พลังงานเป้าหมาย {target_energy:.1f} kWh สูงสุดไม่เกิน "
@@ -304,34 +686,14 @@ class SolarAnalyzerPro:
             )
             target_energy = max_possible_energy
 
-        lo, hi = 0.2, 20.0
-        while daily_energy_for_sigma(hi) < target_energy and hi < 200:
-            hi *= 2.0
-
-        for _ in range(60):
-            mid = 0.5 * (lo + hi)
-            energy_mid = daily_energy_for_sigma(mid)
-            if energy_mid < target_energy:
-                lo = mid
-            else:
-                hi = mid
-        sigma = 0.5 * (lo + hi)
-        print(
-            f"   → sigma ≈ {sigma:.3f} ชม., พลังงานต่อวัน {daily_energy_for_sigma(sigma):.1f} kWh"
-        )
+        sigma, daily_energy, template = _solar_template(solar_capacity_kw, target_energy)
+        print(f"   → sigma ≈ {sigma:.3f} ชม., พลังงานต่อวัน {daily_energy:.1f} kWh")
 
         unique_dates = self.df["date"].unique()
-        template = np.zeros_like(hours)
-        mask_template = (hours >= sunrise) & (hours <= sunset)
-        z_template = (hours[mask_template] - t0) / sigma
-        template[mask_template] = solar_capacity_kw * 0.9 * np.exp(-0.5 * z_template**2)
 
-        all_days: List[np.ndarray] = []
-        for date in unique_dates:
-            all_days.append(template.copy())
-            print(f"   ✅ {date}: พีค {np.max(template):.0f} kW")
-
-        solar_series = np.concatenate(all_days)
+        # Every day uses the same profile, so tile it instead of copying per date
+        solar_series = np.tile(template, len(unique_dates))
+        print(f"   ✅ {len(unique_dates)} วัน: พีค {template.max():.0f} kW ต่อวัน")
 
         # Align with measurement length
         limit = min(len(self.df), len(solar_series))
@@ -342,6 +704,13 @@ class SolarAnalyzerPro:
     # --------------------------------------------------------------------- #
     # Battery analytics                                                     #
     # --------------------------------------------------------------------- #
+    def _day_indices(self) -> Dict[object, np.ndarray]:
+        """
+        Row positions of every date in ``self.df`` from one groupby pass,
+        instead of a full ``df["date"] == date`` scan per day.
+        """
+        return self.df.groupby("date", sort=False).indices
+
     def calculate_daily_battery_requirements(self) -> None:
         """
         Compute per-day battery envelopes and supporting metrics.
@@ -351,64 +720,31 @@ class SolarAnalyzerPro:
 
         print("🔋 กำลังคำนวณความต้องการแบตเตอรี่...")
         unique_dates = self.df["date"].unique()
+        day_indices = self._day_indices()
+        consumption = self.df["consumption"].to_numpy()
+        hours = self.df["datetime"].dt.hour.to_numpy()
+        threshold_kw = self.battery_threshold_w / 1000.0
         analysis: List[Dict] = []
-
         for date in unique_dates:
-            mask = self.df["date"] == date
-            daily_consumption = self.df.loc[mask, "consumption"].to_numpy()
-            daily_solar = self.solar_generation[mask]
-            daily_datetime = self.df.loc[mask, "datetime"].reset_index(drop=True)
-
-            power_difference = daily_solar - daily_consumption
-            cumulative_balance = np.cumsum(power_difference) * 0.25
-
-            max_excess = float(np.max(cumulative_balance))
-            max_deficit = float(np.min(cumulative_balance))
-            battery_size_needed = max(abs(max_excess), abs(max_deficit))
-
-            total_excess_energy = float(
-                np.trapz(np.maximum(0, power_difference), dx=0.25)
-            )
-            total_deficit_energy = float(
-                np.trapz(np.maximum(0, -power_difference), dx=0.25)
-            )
-            net_energy_balance = total_excess_energy - total_deficit_energy
-            
-            # Use user-specified battery size if provided, otherwise calculate optimal size
-            if self.battery_size_kwh > 0:
-                optimal_battery_size = self.battery_size_kwh
-            else:
-                optimal_battery_size = battery_size_needed * 0.8
-
-            consumption_area = float(np.trapz(daily_consumption, dx=0.25))
-            solar_area = float(np.trapz(daily_solar, dx=0.25))
-
-            solar_metrics = self.calculate_solar_metrics(
-                daily_consumption,
-                daily_solar,
-                daily_datetime,
-                power_difference,
-            )
-
+            # Each day is analysed from its own row slices of the shared arrays
+            idx = day_indices[date]
             analysis.append(
-                {
-                    "date": date,
-                    "power_difference": power_difference,
-                    "cumulative_balance": cumulative_balance,
-                    "max_excess": max_excess,
-                    "max_deficit": max_deficit,
-                    "battery_size_needed": battery_size_needed,
-                    "optimal_battery_size": optimal_battery_size,
-                    "total_excess_energy": total_excess_energy,
-                    "total_deficit_energy": total_deficit_energy,
-                    "net_energy_balance": net_energy_balance,
-                    "consumption_area": consumption_area,
-                    "solar_area": solar_area,
-                    **solar_metrics,
-                }
+                _analyze_day(
+                    date,
+                    consumption[idx],
+                    self.solar_generation[idx],
+                    hours[idx],
+                    self.battery_size_kwh,
+                    threshold_kw,
+                )
             )
 
         self.battery_analysis = analysis
+        # Column-wise view of the per-day scalars for reductions across days;
+        # the time series stay in ``battery_analysis`` because day lengths vary
+        self.battery_df = pd.DataFrame.from_records(
+            analysis, exclude=BATTERY_SERIES_FIELDS, index="date"
+        )
         print(f"✅ วิเคราะห์แบตเตอรี่เสร็จสิ้น: {len(analysis)} วัน")
 
     def calculate_solar_metrics(
@@ -417,71 +753,247 @@ class SolarAnalyzerPro:
         daily_solar: np.ndarray,
         daily_datetime: pd.Series,
         power_difference: np.ndarray,
-    ) -> Dict[str, float]:
+        hours: Optional[np.ndarray] = None,
+    ) -> Dict[str, object]:
         """
-        Extended solar/battery metrics for report annotations.
+        Extended solar/battery metrics for report annotations, plus the
+        evening discharge and resulting load series. ``hours`` may carry the
+        precomputed hour of each sample to skip the datetime accessor.
         """
-        solar_produced_per_day = float(np.trapz(daily_solar, dx=0.25))
-
-        # Direct solar consumption
-        direct_use = 0.0
-        for solar_kw, load_kw in zip(daily_solar, daily_consumption):
-            direct_use += min(solar_kw, load_kw) * 0.25
+        if hours is None:
+            hours = daily_datetime.dt.hour.to_numpy()
+        return _daily_solar_metrics(
+            np.asarray(daily_consumption),
+            np.asarray(daily_solar),
+            hours,
+            power_difference,
+            self.battery_threshold_w / 1000.0,
+            self.battery_size_kwh,
+        )
 
-        solar_to_battery = float(np.trapz(np.maximum(0.0, power_difference), dx=0.25))
+    # --------------------------------------------------------------------- #
+    # Visualisations                                                        #
+    # --------------------------------------------------------------------- #
+    def _draw_daily_graph(
+        self,
+        fig,
+        axes,
+        day_data: Dict[str, object],
+        daily_datetime: np.ndarray,
+        daily_consumption: np.ndarray,
+        daily_solar: np.ndarray,
+        daily_hours: np.ndarray,
+    ) -> None:
+        """
+        Draw the 4 daily panels for ``day_data`` onto ``fig``/``axes``. The
+        day's samples come in as plain arrays, which matplotlib would
+        otherwise convert from Series on every call.
+        """
+        plt, mdates = _plotting()
+        date = day_data["date"]
+        # Determine battery size description for title
+        if self.battery_size_kwh > 0:
+            battery_desc = f"ขนาดแบตเตอรี่ที่กำหนด: {self.battery_size_kwh:.0f} kWh"
+        else:
+            battery_desc = f"ขนาดแบตเตอรี่แนะนำ: {day_data['optimal_battery_size']:.0f} kWh"
+        
+        fig.suptitle(
+            f"การวิเคราะห์กำลังไฟรายวันที่ {date}\n"
+            f"โซลาร์ {self.solar_capacity_mw:.1f} MWp, แดด {self.sun_hours:.1f} ชม./วัน\n"
+            f"{battery_desc}",
+            fontsize=16,
+            fontweight="bold",
+        )
 
-        load_16_22 = 0.0
         threshold_kw = self.battery_threshold_w / 1000.0
 
-        load_16_22_with_threshold = 0.0
-        excess_above_threshold_area = 0.0
-        battery_discharge_area = 0.0
-        load_above_threshold_area = 0.0
+        # Panel 1: Load vs Solar
+        ax1 = axes[0]
+        ax1.fill_between(
+            daily_datetime, 0, daily_consumption, alpha=0.3, color="red", label="โหลด (kW)"
+        )
+        ax1.fill_between(
+            daily_datetime,
+            0,
+            daily_solar,
+            alpha=0.3,
+            color="orange",
+            label="โซลาร์ (kW)",
+        )
+        ax1.plot(daily_datetime, daily_consumption, color="red", linewidth=2)
+        ax1.plot(daily_datetime, daily_solar, color="orange", linewidth=2)
+        ax1.axhline(
+            threshold_kw,
+            color="purple",
+            linestyle="--",
+            linewidth=2,
+            label=f"เกณฑ์ {self.battery_threshold_w:.0f} W",
+        )
+
+        exceed_solar = np.maximum(0, daily_solar - threshold_kw)
+        ax1.fill_between(
+            daily_datetime,
+            threshold_kw,
+            daily_solar,
+            where=(daily_solar > threshold_kw),
+            color="yellow",
+            alpha=0.4,
+            label=f"พลังงานเกิน: {day_data['excess_above_1500_area']:.0f} kWh",
+        )
+        ax1.axhline(y=0, color="black", linestyle="-", alpha=0.3)
+        ax1.set_title("เปรียบเทียบกำลังไฟ (Power)")
+        ax1.set_ylabel("กำลังไฟ (kW)")
+        ax1.legend()
+        ax1.grid(True, alpha=0.3)
+        ax1.xaxis.set_major_formatter(mdates.DateFormatter("%H:%M"))
+        plt.setp(ax1.xaxis.get_majorticklabels(), rotation=45)
 
-        # Cap the available battery energy at the specified battery size
+        # Panel 2: Power difference (charging vs discharging)
+        ax2 = axes[1]
+        diff = day_data["power_difference"]
+        positive_diff = np.maximum(0, diff)
+        negative_diff = np.minimum(0, diff)
+        ax2.fill_between(
+            daily_datetime,
+            0,
+            positive_diff,
+            where=positive_diff > 0,
+            alpha=0.7,
+            color="green",
+            label="พลังงานเกิน (ชาร์จแบต)",
+        )
+        ax2.fill_between(
+            daily_datetime,
+            0,
+            negative_diff,
+            where=negative_diff < 0,
+            alpha=0.7,
+            color="blue",
+            label="พลังงานขาด (จ่ายจากแบต/กริด)",
+        )
+        ax2.axhline(y=0, color="black", linewidth=1, alpha=0.5)
+        ax2.set_title(
+            f"สมดุลพลังงาน: เกิน {day_data['total_excess_energy']:.0f} kWh, "
+            f"ขาด {day_data['total_deficit_energy']:.0f} kWh"
+        )
+        ax2.set_ylabel("กำลังไฟ (kW)")
+        ax2.legend()
+        ax2.grid(True, alpha=0.3)
+        ax2.xaxis.set_major_formatter(mdates.DateFormatter("%H:%M"))
+        plt.setp(ax2.xaxis.get_majorticklabels(), rotation=45)
+
+        # Panel 3: Battery dispatch 16:00-22:00
+        ax3 = axes[2]
+        evening = _evening_slice(daily_hours)
+        evening_datetime = daily_datetime[evening]
+        evening_consumption = daily_consumption[evening]
+
+        # The dispatch was already simulated by calculate_solar_metrics
+        area_above_threshold = day_data["load_above_1500_area_16_22"]
+        battery_discharge = day_data["battery_discharge_kw"]
+        battery_discharge_energy_total = day_data["battery_discharge_16_22_area"]
+        effective_load = day_data["effective_load_kw"]
+
+        ax3.fill_between(
+            evening_datetime, 0, evening_consumption, alpha=0.3, color="red", label="โหลด (kW)"
+        )
+        ax3.plot(evening_datetime, evening_consumption, color="red", linewidth=2)
+        ax3.fill_between(
+            evening_datetime,
+            0,
+            battery_discharge,
+            alpha=0.7,
+            color="cyan",
+            label=f"แบตจ่ายไฟ: {battery_discharge_energy_total:.0f} kWh",
+        )
+        ax3.plot(evening_datetime, battery_discharge, color="cyan", linewidth=2)
+        ax3.plot(
+            evening_datetime,
+            effective_load,
+            color="green",
+            linewidth=2,
+            label=f"โหลดหลังใช้แบต: {_trapz_uniform(effective_load):.0f} kWh",
+        )
+        ax3.fill_between(
+            evening_datetime,
+            threshold_kw,
+            evening_consumption,
+            where=(evening_consumption > threshold_kw),
+            color="yellow",
+            alpha=0.5,
+            label=f"โหลดเกิน {self.battery_threshold_w:.0f}W: {area_above_threshold:.0f} kWh",
+        )
+        ax3.axhline(
+            threshold_kw,
+            color="purple",
+            linestyle="--",
+            linewidth=2,
+            label=f"เกณฑ์ {self.battery_threshold_w:.0f} W",
+        )
+        ax3.set_title("การจ่ายไฟจากแบตช่วง 16:00-22:00 น.")
+        ax3.set_ylabel("กำลังไฟ (kW)")
+        ax3.legend()
+        ax3.grid(True, alpha=0.3)
+        ax3.xaxis.set_major_formatter(mdates.DateFormatter("%H:%M"))
+        plt.setp(ax3.xaxis.get_majorticklabels(), rotation=45)
+
+        # Panel 4: Cumulative battery state
+        ax4 = axes[3]
+        cumulative_balance = day_data["cumulative_balance"]
+        ax4.fill_between(
+            daily_datetime,
+            0,
+            cumulative_balance,
+            alpha=0.3,
+            color="purple",
+            label="สถานะแบตเตอรี่ (kWh)",
+        )
+        ax4.plot(daily_datetime, cumulative_balance, color="purple", linewidth=2)
+        ax4.axhline(y=0, color="black", linestyle="-", alpha=0.5)
+        ax4.axhline(
+            day_data["max_excess"],
+            color="green",
+            linestyle="--",
+            label=f"สูงสุด: {day_data['max_excess']:.0f} kWh",
+        )
+        ax4.axhline(
+            day_data["max_deficit"],
+            color="red",
+            linestyle="--",
+            label=f"ต่ำสุด: {day_data['max_deficit']:.0f} kWh",
+        )
+        # Determine battery size description for legend
         if self.battery_size_kwh > 0:
-            remaining_battery_energy = min(solar_to_battery, self.battery_size_kwh)
+            battery_label = f"แบตที่กำหนด: {self.battery_size_kwh:.0f} kWh"
+            battery_value = self.battery_size_kwh
         else:
-            remaining_battery_energy = solar_to_battery  # 100% round-trip efficiency
-
-        for idx, (dt, load_kw, solar_kw) in enumerate(
-            zip(daily_datetime, daily_consumption, daily_solar)
-        ):
-            hour = int(dt.hour)
-            if 16 <= hour < 22:
-                load_16_22 += load_kw * 0.25
-
-            if solar_kw > threshold_kw:
-                excess_above_threshold_area += (solar_kw - threshold_kw) * 0.25
-
-            if 16 <= hour < 22:
-                if load_kw > threshold_kw:
-                    load_excess = load_kw - threshold_kw
-                    load_above_threshold_area += load_excess * 0.25
-                    energy_needed = load_excess * 0.25
-                    discharge_energy = min(remaining_battery_energy, energy_needed)
-                    battery_discharge_area += discharge_energy
-                    remaining_battery_energy -= discharge_energy
-                    uncovered_power = load_excess - discharge_energy / 0.25
-                    effective_load = threshold_kw + max(0.0, uncovered_power)
-                else:
-                    effective_load = load_kw
-                load_16_22_with_threshold += effective_load * 0.25
-
-        return {
-            "solar_produced_per_day": solar_produced_per_day,
-            "solar_consumed_directly": float(direct_use),
-            "solar_to_battery": solar_to_battery,
-            "load_16_22": float(load_16_22),
-            "load_16_22_with_battery_threshold": float(load_16_22_with_threshold),
-            "excess_above_1500_area": float(excess_above_threshold_area),
-            "battery_discharge_16_22_area": float(battery_discharge_area),
-            "load_above_1500_area_16_22": float(load_above_threshold_area),
-        }
+            battery_label = f"แบตแนะนำ: {day_data['optimal_battery_size']:.0f} kWh"
+            battery_value = day_data["optimal_battery_size"]
+        
+        ax4.axhline(
+            battery_value,
+            color="blue",
+            linestyle=":",
+            label=battery_label,
+        )
+        ax4.axhline(
+            -battery_value,
+            color="blue",
+            linestyle=":",
+            alpha=0.5,
+        )
+        ax4.set_title(
+            f"สถานะสะสมแบตเตอรี่ (สุทธิ {day_data['net_energy_balance']:.0f} kWh)"
+        )
+        ax4.set_xlabel("เวลา")
+        ax4.set_ylabel("พลังงานสะสม (kWh)")
+        ax4.legend()
+        ax4.grid(True, alpha=0.3)
+        ax4.xaxis.set_major_formatter(mdates.DateFormatter("%H:%M"))
+        plt.setp(ax4.xaxis.get_majorticklabels(), rotation=45)
+
+        fig.tight_layout()
 
-    # --------------------------------------------------------------------- #
-    # Visualisations                                                        #
-    # --------------------------------------------------------------------- #
     def create_daily_graphs_with_battery(self) -> None:
         """
         For each day create a 4-panel plot summarising production, load,
@@ -491,406 +1003,219 @@ class SolarAnalyzerPro:
             print("⚠️ ไม่มีข้อมูลแบตเตอรี่สำหรับสร้างกราฟรายวัน")
             return
 
-        for day_data in self.battery_analysis:
-            date = day_data["date"]
-            mask = self.df["date"] == date
-            daily_consumption = self.df.loc[mask, "consumption"]
-            daily_solar = self.solar_generation[mask]
-            daily_datetime = self.df.loc[mask, "datetime"]
-
-            fig, axes = plt.subplots(4, 1, figsize=(16, 16))
-            # Determine battery size description for title
-            if self.battery_size_kwh > 0:
-                battery_desc = f"ขนาดแบตเตอรี่ที่กำหนด: {self.battery_size_kwh:.0f} kWh"
-            else:
-                battery_desc = f"ขนาดแบตเตอรี่แนะนำ: {day_data['optimal_battery_size']:.0f} kWh"
-            
+        plt, _ = _plotting()
+        day_indices = self._day_indices()
+        # Converted once; each day is then a slice of these arrays
+        consumption = self.df["consumption"].to_numpy()
+        datetimes = self.df["datetime"].to_numpy()
+        hours = self.df["datetime"].dt.hour.to_numpy()
+        # One figure is reused for every day; only the axes are cleared
+        fig, axes = plt.subplots(4, 1, figsize=(16, 16))
+        # tight_layout() adjusts from the current layout, so every day starts
+        # from the initial one to render exactly like a fresh figure
+        initial_layout = {
+            name: getattr(fig.subplotpars, name)
+            for name in ("left", "right", "bottom", "top", "wspace", "hspace")
+        }
+        try:
+            for day_data in self.battery_analysis:
+                date = day_data["date"]
+                idx = day_indices[date]
+                daily_consumption = consumption[idx]
+                daily_solar = self.solar_generation[idx]
+                daily_datetime = datetimes[idx]
+
+                for ax in axes:
+                    ax.clear()
+                fig.subplots_adjust(**initial_layout)
+                self._draw_daily_graph(
+                    fig,
+                    axes,
+                    day_data,
+                    daily_datetime,
+                    daily_consumption,
+                    daily_solar,
+                    hours[idx],
+                )
+                filename = f"solar_daily_analysis_{date}.png"
+                path = os.path.join(self.output_dir, filename)
+                # tight_layout already fits the panels; bbox_inches="tight"
+                # would render every page twice just to measure it
+                _save_png(fig, path, dpi=150)
+                print(f"   📈 บันทึกกราฟ {filename}")
+        finally:
+            # Release the figure even if drawing or saving fails
+            plt.close(fig)
+
+    def create_weekly_summary(self) -> None:
+        """
+        Generate a 3-panel weekly summary covering the most recent 7 days.
+        """
+        if self.df is None or self.df.empty or self.solar_generation is None:
+            print("⚠️ ไม่มีข้อมูลเพียงพอสำหรับกราฟสรุปรายสัปดาห์")
+            return
+
+        unique_dates = sorted(self.df["date"].unique())
+        if not unique_dates:
+            print("⚠️ ไม่มีวันที่ในข้อมูล")
+            return
+
+        plt, mdates = _plotting()
+
+        if len(unique_dates) > 7:
+            unique_dates = unique_dates[-7:]
+
+        # Read-only selection of the columns used; the same positional mask
+        # keeps the solar series aligned even if the dates are not contiguous
+        mask = self.df["date"].isin(unique_dates).to_numpy()
+        df_filtered = self.df.loc[mask, ["datetime", "consumption", "date"]]
+        solar_filtered = self.solar_generation[mask]
+
+        # Columns as arrays once; every plot call below reuses them
+        cons = df_filtered["consumption"].to_numpy()
+        dt = df_filtered["datetime"].to_numpy()
+        dates_col = df_filtered["date"].to_numpy()
+
+        # Rows are sorted by time, so every date is one contiguous block
+        _, starts = np.unique(dt.astype("datetime64[D]"), return_index=True)
+        series, totals, per_day, means = _weekly_areas(cons, solar_filtered, starts)
+        cons_mean, solar_mean = means[:2].tolist()
+        # Matplotlib date numbers once, instead of a unit conversion per call
+        dt_num = mdates.date2num(dt)
+        excess_power, negative_deficit = series[2], series[3]
+        (
+            total_consumption_area,
+            total_solar_area,
+            total_excess_area,
+            total_deficit_area,
+        ) = totals.tolist()
+
+        fig, axes = plt.subplots(3, 1, figsize=(20, 16))
+        try:
             fig.suptitle(
-                f"การวิเคราะห์กำลังไฟรายวันที่ {date}\n"
-                f"โซลาร์ {self.solar_capacity_mw:.1f} MWp, แดด {self.sun_hours:.1f} ชม./วัน\n"
-                f"{battery_desc}",
-                fontsize=16,
+                f"กราฟวิเคราะห์กำลังไฟ {len(unique_dates)} วัน\n"
+                f"โซลาร์ {self.solar_capacity_mw:.1f} MWp, แดด {self.sun_hours:.1f} ชม./วัน",
+                fontsize=18,
                 fontweight="bold",
             )
 
-            threshold_kw = self.battery_threshold_w / 1000.0
-
-            # Panel 1: Load vs Solar
             ax1 = axes[0]
             ax1.fill_between(
-                daily_datetime, 0, daily_consumption, alpha=0.3, color="red", label="โหลด (kW)"
+                dt_num,
+                0,
+                cons,
+                alpha=0.3,
+                color="red",
+                label="โหลด (kW)",
             )
             ax1.fill_between(
-                daily_datetime,
+                dt_num,
                 0,
-                daily_solar,
+                solar_filtered,
                 alpha=0.3,
                 color="orange",
                 label="โซลาร์ (kW)",
             )
-            ax1.plot(daily_datetime, daily_consumption, color="red", linewidth=2)
-            ax1.plot(daily_datetime, daily_solar, color="orange", linewidth=2)
+            ax1.plot(dt_num, cons, color="red")
+            ax1.plot(dt_num, solar_filtered, color="orange")
             ax1.axhline(
-                threshold_kw,
-                color="purple",
+                cons_mean,
+                color="darkred",
                 linestyle="--",
                 linewidth=2,
-                label=f"เกณฑ์ {self.battery_threshold_w:.0f} W",
+                label=f"เฉลี่ยโหลด: {cons_mean:.0f} kW",
             )
-
-            exceed_solar = np.maximum(0, daily_solar - threshold_kw)
-            ax1.fill_between(
-                daily_datetime,
-                threshold_kw,
-                daily_solar,
-                where=(daily_solar > threshold_kw),
-                color="yellow",
-                alpha=0.4,
-                label=f"พลังงานเกิน: {day_data['excess_above_1500_area']:.0f} kWh",
+            ax1.axhline(
+                solar_mean,
+                color="darkorange",
+                linestyle="--",
+                linewidth=2,
+                label=f"เฉลี่ยโซลาร์: {solar_mean:.0f} kW",
             )
-            ax1.axhline(y=0, color="black", linestyle="-", alpha=0.3)
-            ax1.set_title("เปรียบเทียบกำลังไฟ (Power)")
+            ax1.set_title("เปรียบเทียบกำลังไฟ (7 วันล่าสุด)")
             ax1.set_ylabel("กำลังไฟ (kW)")
             ax1.legend()
             ax1.grid(True, alpha=0.3)
-            ax1.xaxis.set_major_formatter(mdates.DateFormatter("%H:%M"))
+            ax1.xaxis_date()
+            ax1.xaxis.set_major_formatter(mdates.DateFormatter("%d/%m\n%H:%M"))
             plt.setp(ax1.xaxis.get_majorticklabels(), rotation=45)
 
-            # Panel 2: Power difference (charging vs discharging)
             ax2 = axes[1]
-            diff = day_data["power_difference"]
-            positive_diff = np.maximum(0, diff)
-            negative_diff = np.minimum(0, diff)
             ax2.fill_between(
-                daily_datetime,
+                dt_num,
                 0,
-                positive_diff,
-                where=positive_diff > 0,
+                excess_power,
                 alpha=0.7,
                 color="green",
                 label="พลังงานเกิน (ชาร์จแบต)",
             )
             ax2.fill_between(
-                daily_datetime,
+                dt_num,
                 0,
-                negative_diff,
-                where=negative_diff < 0,
+                negative_deficit,
                 alpha=0.7,
                 color="blue",
-                label="พลังงานขาด (จ่ายจากแบต/กริด)",
+                label="พลังงานขาด (ใช้จากแบต/กริด)",
             )
             ax2.axhline(y=0, color="black", linewidth=1, alpha=0.5)
             ax2.set_title(
-                f"สมดุลพลังงาน: เกิน {day_data['total_excess_energy']:.0f} kWh, "
-                f"ขาด {day_data['total_deficit_energy']:.0f} kWh"
+                f"สมดุลพลังงานรวม: เกิน {total_excess_area:.0f} kWh, "
+                f"ขาด {total_deficit_area:.0f} kWh"
             )
             ax2.set_ylabel("กำลังไฟ (kW)")
             ax2.legend()
             ax2.grid(True, alpha=0.3)
-            ax2.xaxis.set_major_formatter(mdates.DateFormatter("%H:%M"))
+            ax2.xaxis_date()
+            ax2.xaxis.set_major_formatter(mdates.DateFormatter("%d/%m\n%H:%M"))
             plt.setp(ax2.xaxis.get_majorticklabels(), rotation=45)
 
-            # Panel 3: Battery dispatch 16:00-22:00
             ax3 = axes[2]
-            evening_mask = (daily_datetime.dt.hour >= 16) & (daily_datetime.dt.hour < 22)
-            evening_datetime = daily_datetime[evening_mask]
-            evening_consumption = daily_consumption[evening_mask].to_numpy()
-
-            load_above_threshold = np.maximum(0, evening_consumption - threshold_kw)
-            area_above_threshold = float(load_above_threshold.sum()) * 0.25
-
-            battery_discharge = np.zeros_like(evening_consumption)
-            # Cap the available battery energy at the specified battery size
-            if self.battery_size_kwh > 0:
-                remaining_energy = min(float(day_data["solar_to_battery"]), self.battery_size_kwh)
-            else:
-                remaining_energy = float(day_data["solar_to_battery"])
-            battery_discharge_energy_total = 0.0
-
-            for idx, excess in enumerate(load_above_threshold):
-                if excess <= 0 or remaining_energy <= 0:
-                    continue
-                energy_needed = excess * 0.25
-                discharge_energy = min(remaining_energy, energy_needed)
-                battery_discharge[idx] = discharge_energy / 0.25
-                remaining_energy -= discharge_energy
-                battery_discharge_energy_total += discharge_energy
-
-            effective_load = np.maximum(0, evening_consumption - battery_discharge)
-
-            ax3.fill_between(
-                evening_datetime, 0, evening_consumption, alpha=0.3, color="red", label="โหลด (kW)"
+            grouped = pd.DataFrame(
+                {
+                    "date": dates_col[starts],
+                    "consumption_area": per_day[0],
+                    "solar_area": per_day[1],
+                }
             )
-            ax3.plot(evening_datetime, evening_consumption, color="red", linewidth=2)
-            ax3.fill_between(
-                evening_datetime,
-                0,
-                battery_discharge,
+
+            x = np.arange(len(grouped))
+            width = 0.35
+            bars1 = ax3.bar(
+                x - width / 2,
+                grouped["consumption_area"],
+                width,
+                label="โหลดรวมต่อวัน (kWh)",
+                color="red",
                 alpha=0.7,
-                color="cyan",
-                label=f"แบตจ่ายไฟ: {battery_discharge_energy_total:.0f} kWh",
             )
-            ax3.plot(evening_datetime, battery_discharge, color="cyan", linewidth=2)
-            ax3.plot(
-                evening_datetime,
-                effective_load,
-                color="green",
-                linewidth=2,
-                label=f"โหลดหลังใช้แบต: {float(np.trapz(effective_load, dx=0.25)):.0f} kWh",
-            )
-            ax3.fill_between(
-                evening_datetime,
-                threshold_kw,
-                evening_consumption,
-                where=(evening_consumption > threshold_kw),
-                color="yellow",
-                alpha=0.5,
-                label=f"โหลดเกิน {self.battery_threshold_w:.0f}W: {area_above_threshold:.0f} kWh",
-            )
-            ax3.axhline(
-                threshold_kw,
-                color="purple",
-                linestyle="--",
-                linewidth=2,
-                label=f"เกณฑ์ {self.battery_threshold_w:.0f} W",
+            bars2 = ax3.bar(
+                x + width / 2,
+                grouped["solar_area"],
+                width,
+                label="โซลาร์รวมต่อวัน (kWh)",
+                color="orange",
+                alpha=0.7,
             )
-            ax3.set_title("การจ่ายไฟจากแบตช่วง 16:00-22:00 น.")
-            ax3.set_ylabel("กำลังไฟ (kW)")
+            ax3.set_xticks(x)
+            # Day labels in one vectorized strftime over the block start times
+            day_labels = pd.DatetimeIndex(dt[starts]).strftime("%d/%m")
+            ax3.set_xticklabels(day_labels, rotation=0)
+            ax3.set_ylabel("พลังงาน (kWh)")
+            ax3.set_title("สรุปพลังงานรายวัน")
             ax3.legend()
-            ax3.grid(True, alpha=0.3)
-            ax3.xaxis.set_major_formatter(mdates.DateFormatter("%H:%M"))
-            plt.setp(ax3.xaxis.get_majorticklabels(), rotation=45)
-
-            # Panel 4: Cumulative battery state
-            ax4 = axes[3]
-            cumulative_balance = day_data["cumulative_balance"]
-            ax4.fill_between(
-                daily_datetime,
-                0,
-                cumulative_balance,
-                alpha=0.3,
-                color="purple",
-                label="สถานะแบตเตอรี่ (kWh)",
-            )
-            ax4.plot(daily_datetime, cumulative_balance, color="purple", linewidth=2)
-            ax4.axhline(y=0, color="black", linestyle="-", alpha=0.5)
-            ax4.axhline(
-                day_data["max_excess"],
-                color="green",
-                linestyle="--",
-                label=f"สูงสุด: {day_data['max_excess']:.0f} kWh",
-            )
-            ax4.axhline(
-                day_data["max_deficit"],
-                color="red",
-                linestyle="--",
-                label=f"ต่ำสุด: {day_data['max_deficit']:.0f} kWh",
-            )
-            # Determine battery size description for legend
-            if self.battery_size_kwh > 0:
-                battery_label = f"แบตที่กำหนด: {self.battery_size_kwh:.0f} kWh"
-                battery_value = self.battery_size_kwh
-            else:
-                battery_label = f"แบตแนะนำ: {day_data['optimal_battery_size']:.0f} kWh"
-                battery_value = day_data["optimal_battery_size"]
-            
-            ax4.axhline(
-                battery_value,
-                color="blue",
-                linestyle=":",
-                label=battery_label,
-            )
-            ax4.axhline(
-                -battery_value,
-                color="blue",
-                linestyle=":",
-                alpha=0.5,
-            )
-            ax4.set_title(
-                f"สถานะสะสมแบตเตอรี่ (สุทธิ {day_data['net_energy_balance']:.0f} kWh)"
-            )
-            ax4.set_xlabel("เวลา")
-            ax4.set_ylabel("พลังงานสะสม (kWh)")
-            ax4.legend()
-            ax4.grid(True, alpha=0.3)
-            ax4.xaxis.set_major_formatter(mdates.DateFormatter("%H:%M"))
-            plt.setp(ax4.xaxis.get_majorticklabels(), rotation=45)
-
-            plt.tight_layout()
-            filename = f"solar_daily_analysis_{date}.png"
-            path = os.path.join(self.output_dir, filename)
-            fig.savefig(path, dpi=300, bbox_inches="tight")
-            plt.close(fig)
-            print(f"   📈 บันทึกกราฟ {filename}")
-
-    def create_weekly_summary(self) -> None:
-        """
-        Generate a 3-panel weekly summary covering the most recent 7 days.
-        """
-        if self.df is None or self.df.empty or self.solar_generation is None:
-            print("⚠️ ไม่มีข้อมูลเพียงพอสำหรับกราฟสรุปรายสัปดาห์")
-            return
-
-        unique_dates = sorted(self.df["date"].unique())
-        if not unique_dates:
-            print("⚠️ ไม่มีวันที่ในข้อมูล")
-            return
-
-        if len(unique_dates) > 7:
-            unique_dates = unique_dates[-7:]
-
-        mask = self.df["date"].isin(unique_dates)
-        df_filtered = self.df.loc[mask].copy()
-
-        start_idx = df_filtered.index.min()
-        end_idx = df_filtered.index.max()
-        solar_filtered = self.solar_generation[start_idx : end_idx + 1]
-
-        power_difference = solar_filtered - df_filtered["consumption"].to_numpy()
-        excess_power = np.maximum(0, power_difference)
-        deficit_power = np.maximum(0, -power_difference)
-
-        total_consumption_area = float(np.trapz(df_filtered["consumption"], dx=0.25))
-        total_solar_area = float(np.trapz(solar_filtered, dx=0.25))
-        total_excess_area = float(np.trapz(excess_power, dx=0.25))
-        total_deficit_area = float(np.trapz(deficit_power, dx=0.25))
-
-        fig, axes = plt.subplots(3, 1, figsize=(20, 16))
-        fig.suptitle(
-            f"กราฟวิเคราะห์กำลังไฟ {len(unique_dates)} วัน\n"
-            f"โซลาร์ {self.solar_capacity_mw:.1f} MWp, แดด {self.sun_hours:.1f} ชม./วัน",
-            fontsize=18,
-            fontweight="bold",
-        )
-
-        ax1 = axes[0]
-        ax1.fill_between(
-            df_filtered["datetime"],
-            0,
-            df_filtered["consumption"],
-            alpha=0.3,
-            color="red",
-            label="โหลด (kW)",
-        )
-        ax1.fill_between(
-            df_filtered["datetime"],
-            0,
-            solar_filtered,
-            alpha=0.3,
-            color="orange",
-            label="โซลาร์ (kW)",
-        )
-        ax1.plot(df_filtered["datetime"], df_filtered["consumption"], color="red")
-        ax1.plot(df_filtered["datetime"], solar_filtered, color="orange")
-        ax1.axhline(
-            df_filtered["consumption"].mean(),
-            color="darkred",
-            linestyle="--",
-            linewidth=2,
-            label=f"เฉลี่ยโหลด: {df_filtered['consumption'].mean():.0f} kW",
-        )
-        ax1.axhline(
-            solar_filtered.mean(),
-            color="darkorange",
-            linestyle="--",
-            linewidth=2,
-            label=f"เฉลี่ยโซลาร์: {solar_filtered.mean():.0f} kW",
-        )
-        ax1.set_title("เปรียบเทียบกำลังไฟ (7 วันล่าสุด)")
-        ax1.set_ylabel("กำลังไฟ (kW)")
-        ax1.legend()
-        ax1.grid(True, alpha=0.3)
-        ax1.xaxis.set_major_formatter(mdates.DateFormatter("%d/%m\n%H:%M"))
-        plt.setp(ax1.xaxis.get_majorticklabels(), rotation=45)
+            ax3.grid(True, alpha=0.3, axis="y")
 
-        ax2 = axes[1]
-        ax2.fill_between(
-            df_filtered["datetime"],
-            0,
-            excess_power,
-            alpha=0.7,
-            color="green",
-            label="พลังงานเกิน (ชาร์จแบต)",
-        )
-        ax2.fill_between(
-            df_filtered["datetime"],
-            0,
-            -deficit_power,
-            alpha=0.7,
-            color="blue",
-            label="พลังงานขาด (ใช้จากแบต/กริด)",
-        )
-        ax2.axhline(y=0, color="black", linewidth=1, alpha=0.5)
-        ax2.set_title(
-            f"สมดุลพลังงานรวม: เกิน {total_excess_area:.0f} kWh, "
-            f"ขาด {total_deficit_area:.0f} kWh"
-        )
-        ax2.set_ylabel("กำลังไฟ (kW)")
-        ax2.legend()
-        ax2.grid(True, alpha=0.3)
-        ax2.xaxis.set_major_formatter(mdates.DateFormatter("%d/%m\n%H:%M"))
-        plt.setp(ax2.xaxis.get_majorticklabels(), rotation=45)
+            ax3.bar_label(bars1, fmt="%.0f", padding=3, color="darkred")
+            ax3.bar_label(bars2, fmt="%.0f", padding=3, color="darkorange")
 
-        ax3 = axes[2]
-        grouped = (
-            df_filtered.groupby("date")["consumption"]
-            .apply(lambda s: float(np.trapz(s, dx=0.25)))
-            .reset_index(name="consumption_area")
-        )
-        grouped["solar_area"] = [
-            float(np.trapz(solar_filtered[df_filtered["date"] == date], dx=0.25))
-            for date in grouped["date"]
-        ]
-
-        x = np.arange(len(grouped))
-        width = 0.35
-        bars1 = ax3.bar(
-            x - width / 2,
-            grouped["consumption_area"],
-            width,
-            label="โหลดรวมต่อวัน (kWh)",
-            color="red",
-            alpha=0.7,
-        )
-        bars2 = ax3.bar(
-            x + width / 2,
-            grouped["solar_area"],
-            width,
-            label="โซลาร์รวมต่อวัน (kWh)",
-            color="orange",
-            alpha=0.7,
-        )
-        ax3.set_xticks(x)
-        ax3.set_xticklabels([date.strftime("%d/%m") for date in grouped["date"]], rotation=0)
-        ax3.set_ylabel("พลังงาน (kWh)")
-        ax3.set_title("สรุปพลังงานรายวัน")
-        ax3.legend()
-        ax3.grid(True, alpha=0.3, axis="y")
-
-        for bar in bars1:
-            ax3.annotate(
-                f"{bar.get_height():.0f}",
-                (bar.get_x() + bar.get_width() / 2, bar.get_height()),
-                textcoords="offset points",
-                xytext=(0, 3),
-                ha="center",
-                color="darkred",
-            )
-        for bar in bars2:
-            ax3.annotate(
-                f"{bar.get_height():.0f}",
-                (bar.get_x() + bar.get_width() / 2, bar.get_height()),
-                textcoords="offset points",
-                xytext=(0, 3),
-                ha="center",
-                color="darkorange",
-            )
-
-        plt.tight_layout()
-        filename = "solar_weekly_summary.png"
-        path = os.path.join(self.output_dir, filename)
-        fig.savefig(path, dpi=300, bbox_inches="tight")
-        plt.close(fig)
+            fig.tight_layout()
+            filename = "solar_weekly_summary.png"
+            path = os.path.join(self.output_dir, filename)
+            # Laid out by tight_layout above; no second render to crop it. At
+            # 20x16 in, 200 dpi still gives a 4000x3200 px page
+            _save_png(fig, path, dpi=200)
+        finally:
+            plt.close(fig)
 
         print(
             "✅ บันทึกกราฟสรุปรายสัปดาห์: "
@@ -905,11 +1230,9 @@ class SolarAnalyzerPro:
         """
         Print concise per-day battery summary to stdout.
         """
-        if not self.battery_analysis:
+        if not self.battery_analysis or self.battery_df is None:
             return
 
-        print("\n📝 สรุปผลรายวัน")
-        
         # Determine battery column header based on user input
         if self.battery_size_kwh > 0:
             battery_header = "แบตที่กำหนด(kWh)"
@@ -925,19 +1248,29 @@ class SolarAnalyzerPro:
             battery_header,
             "ใช้แบตช่วงเย็น(kWh)",
         )
-        print("{:<12} {:>12} {:>12} {:>10} {:>10} {:>16} {:>18}".format(*headers))
-        for day in self.battery_analysis:
-            print(
-                "{:<12} {:>12.0f} {:>12.0f} {:>10.0f} {:>10.0f} {:>16.0f} {:>18.0f}".format(
-                    str(day["date"]),
-                    day["consumption_area"],
-                    day["solar_area"],
-                    day["total_excess_energy"],
-                    day["total_deficit_energy"],
-                    day["optimal_battery_size"],
-                    day["battery_discharge_16_22_area"],
-                )
+        columns = self.battery_df[
+            [
+                "consumption_area",
+                "solar_area",
+                "total_excess_energy",
+                "total_deficit_energy",
+                "optimal_battery_size",
+                "battery_discharge_16_22_area",
+            ]
+        ]
+        # The whole table goes out in one write instead of a print per day;
+        # rows are formatted by mapping the bound format over plain float
+        # columns rather than unpacking a tuple per row
+        lines = ["\n📝 สรุปผลรายวัน", _SUMMARY_HEADER_FORMAT(*headers)]
+        lines.extend(
+            map(
+                _SUMMARY_ROW_FORMAT,
+                map(str, columns.index),
+                *(columns[name].tolist() for name in columns.columns),
             )
+        )
+        lines.append("")
+        sys.stdout.write("\n".join(lines))
 
     # --------------------------------------------------------------------- #
     # Main flow                                                             #
@@ -3,39 +3,91 @@
 Test script to verify session timeout fixes for slow data entry
 """
 
+import ast
 import os
+import re
 import sys
 import tempfile
 import time
 from datetime import datetime, timedelta
+from functools import lru_cache
 
 # Add the current directory to Python path
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BASE_DIR)
+
+# Source constructs checked below, compiled once. Each pattern is anchored to
+# the statement it stands for, so mentions in comments or strings don't count
+SESSION_LIFETIME_RE = re.compile(
+    r"^app\.config\['PERMANENT_SESSION_LIFETIME'\]\s*=\s*timedelta\(hours=2\)", re.M)
+SESSION_PERMANENT_RE = re.compile(r"^\s*session\.permanent\s*=\s*True\s*$", re.M)
+KEEP_ALIVE_ROUTE_RE = re.compile(r"^@app\.route\('/keep-alive'", re.M)
+# Searched in the body of cleanup_old_files only
+CLEANUP_AGE_RE = re.compile(r"\b(?:now_ts\s*-\s*mtimes|ages)\s*>\s*7200\b")
+FORM_VALIDATION_RES = tuple(
+    re.compile(pattern, re.M)
+    for pattern in (
+        r"^\s*if \(isNaN\(solarCapacity\)",
+        r"^\s*e\.preventDefault\(\);",
+        r"^\s*alert\('",
+    )
+)
+KEEP_ALIVE_CLIENT_RES = tuple(
+    re.compile(pattern, re.M)
+    for pattern in (
+        r"^\s*const keepAliveInterval = setInterval\(",
+        r"^\s*fetch\('/keep-alive',",
+    )
+)
+SESSION_STATUS_RES = (
+    re.compile(r'<div id="sessionStatus" class="[^"]*\bbg-green-50\b'),
+)
+FILE_EXISTS_RE = re.compile(
+    r"^\s*if not (?:file_path or not )?os\.path\.exists\(file_path\):", re.M)
+SESSION_CLEANUP_RE = re.compile(r"^\s*session\.pop\('uploaded_file', None\)\s*$", re.M)
+
+@lru_cache(maxsize=None)
+def read_source(relative_path):
+    """Read a project file once; every test shares the cached text"""
+    with open(os.path.join(BASE_DIR, relative_path), 'r', encoding='utf-8') as f:
+        return f.read()
+
+@lru_cache(maxsize=None)
+def function_source(relative_path, name):
+    """Source text of the top-level function ``name`` in a project file"""
+    content = read_source(relative_path)
+    for node in ast.parse(content).body:
+        if isinstance(node, ast.FunctionDef) and node.name == name:
+            return ast.get_source_segment(content, node)
+    return ''
+
+def contains_all(patterns, content):
+    """True when every compiled pattern occurs in content"""
+    return all(pattern.search(content) for pattern in patterns)
 
 def test_session_config():
     """Test that session configuration is properly set"""
     print("🧪 Testing session configuration...")
     
     # Read app.py and check for session configuration
-    with open('app.py', 'r') as f:
-        content = f.read()
+    content = read_source('app.py')
     
     # Check for session lifetime configuration
-    if 'PERMANENT_SESSION_LIFETIME' in content and 'timedelta(hours=2)' in content:
+    if SESSION_LIFETIME_RE.search(content):
         print("✅ Session lifetime extended to 2 hours")
     else:
         print("❌ Session lifetime not properly configured")
         return False
     
     # Check for permanent session setting
-    if 'session.permanent = True' in content:
+    if SESSION_PERMANENT_RE.search(content):
         print("✅ Session set to permanent")
     else:
         print("❌ Session not set to permanent")
         return False
     
     # Check for keep-alive endpoint
-    if '/keep-alive' in content:
+    if KEEP_ALIVE_ROUTE_RE.search(content):
         print("✅ Keep-alive endpoint implemented")
     else:
         print("❌ Keep-alive endpoint missing")
@@ -47,11 +99,10 @@ def test_file_cleanup():
     """Test that file cleanup is more conservative"""
     print("\n🧪 Testing file cleanup configuration...")
     
-    with open('app.py', 'r') as f:
-        content = f.read()
+    content = function_source('app.py', 'cleanup_old_files')
     
     # Check for conservative cleanup timing
-    if 'total_seconds() > 7200' in content:
+    if CLEANUP_AGE_RE.search(content):
         print("✅ File cleanup made more conservative (2-hour protection)")
     else:
         print("❌ File cleanup not properly protected")
@@ -63,29 +114,24 @@ def test_client_validation():
     """Test that client-side validation is implemented"""
     print("\n🧪 Testing client-side validation...")
     
-    with open('templates/configure.html', 'r') as f:
-        content = f.read()
+    content = read_source('templates/configure.html')
     
     # Check for form validation (looking for actual validation code)
-    if ('isNaN(solarCapacity)' in content and
-        'e.preventDefault()' in content and
-        'alert(' in content):
+    if contains_all(FORM_VALIDATION_RES, content):
         print("✅ Client-side form validation implemented")
     else:
         print("❌ Client-side form validation missing")
         return False
     
     # Check for keep-alive mechanism
-    if ('keepAliveInterval' in content and
-        'fetch(\'/keep-alive\'' in content):
+    if contains_all(KEEP_ALIVE_CLIENT_RES, content):
         print("✅ Client-side keep-alive mechanism implemented")
     else:
         print("❌ Client-side keep-alive mechanism missing")
         return False
     
     # Check for session status indicator
-    if ('sessionStatus' in content and
-        'bg-green-50' in content):
+    if contains_all(SESSION_STATUS_RES, content):
         print("✅ Session status indicator implemented")
     else:
         print("❌ Session status indicator missing")
@@ -97,18 +143,17 @@ def test_file_validation():
     """Test that file validation is implemented"""
     print("\n🧪 Testing file validation...")
     
-    with open('app.py', 'r') as f:
-        content = f.read()
+    content = read_source('app.py')
     
     # Check for file existence validation
-    if 'os.path.exists(file_path)' in content:
+    if FILE_EXISTS_RE.search(content):
         print("✅ File existence validation implemented")
     else:
         print("❌ File existence validation missing")
         return False
     
     # Check for session cleanup on file not found
-    if 'session.pop(\'uploaded_file\', None)' in content:
+    if SESSION_CLEANUP_RE.search(content):
         print("✅ Session cleanup on file not found implemented")
     else:
         print("❌ Session cleanup on file not found missing")
@@ -116,6 +161,33 @@ def test_file_validation():
     
     return True
 
+def test_six_column_csv():
+    """Test that a meter export without the trailing empty column still loads"""
+    print("\n🧪 Testing 6-column CSV loading...")
+
+    from solar_analyzer_pro import SolarAnalyzerPro
+
+    # One day of the bundled 7-column sample with the trailing comma dropped
+    with open(os.path.join(BASE_DIR, 'data', 'kw.csv'), 'r', encoding='utf-8-sig') as f:
+        lines = [line.rstrip('\r\n').rstrip(',') for line in f][:97]
+
+    fd, path = tempfile.mkstemp(suffix='.csv')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        analyzer = SolarAnalyzerPro()
+        loaded = analyzer.load_and_parse_data(path)
+    finally:
+        os.unlink(path)
+
+    if loaded and len(analyzer.df) == 96:
+        print("✅ 6-column CSV loaded (96 rows)")
+    else:
+        print("❌ 6-column CSV failed to load")
+        return False
+
+    return True
+
 def main():
     """Run all tests"""
     print("🔧 Testing Solar Analyzer Session Timeout Fixes")
@@ -125,7 +197,8 @@ def main():
         test_session_config,
         test_file_cleanup,
         test_client_validation,
-        test_file_validation
+        test_file_validation,
+        test_six_column_csv
     ]
     
     results = []